@@ -4,7 +4,42 @@
 
 """procedurally generate command-line interfaces from callables"""
 
-from clize.parser import Parameter
-from clize.runner import Clize, SubcommandDispatcher, run
-from clize.legacy import clize, make_flag
-from clize.errors import UserError, ArgumentError
+import sys
+
+
+_lazy_names = {
+    'Parameter': 'clize.parser',
+    'Clize': 'clize.runner',
+    'SubcommandDispatcher': 'clize.runner',
+    'run': 'clize.runner',
+    'clize': 'clize.legacy',
+    'make_flag': 'clize.legacy',
+    'UserError': 'clize.errors',
+    'ArgumentError': 'clize.errors',
+}
+
+__all__ = sorted(_lazy_names)
+
+
+def __getattr__(name):
+    """Imports the public names on first access, so that ``import clize``
+    alone doesn't pull in the parser, sigtools or the legacy module."""
+    try:
+        modname = _lazy_names[name]
+    except KeyError:
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+    value = getattr(__import__(modname, fromlist=[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names))
+
+
+if sys.version_info < (3, 7): # pragma: no cover
+    # module-level __getattr__ is unavailable (PEP 562)
+    for _name in __all__:
+        __getattr__(_name)
+    del _name
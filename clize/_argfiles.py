@@ -0,0 +1,209 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+"""expansion of ``@path`` arguments into the contents of response files"""
+
+import io
+import os
+import sys
+import mmap
+import shlex
+
+import six
+
+from clize import errors
+
+
+MMAP_THRESHOLD = 1 << 16
+"""Files at least this large are memory-mapped rather than read."""
+
+MODES = ('lines', 'nul', 'shell')
+
+
+if six.PY2: # pragma: no cover
+    def _decode(data):
+        return data
+
+    def _open_text(path):
+        return open(path)
+else:
+    _decode = os.fsdecode
+
+    def _open_text(path):
+        return io.open(
+            path, encoding=sys.getfilesystemencoding(),
+            errors='surrogateescape')
+
+
+CHUNK_SIZE = 1 << 20
+"""Amount of bytes decoded at once from memory-mapped files."""
+
+
+def _split(data, sep):
+    tokens = _decode(data).split(_decode(sep))
+    if sep == b'\n':
+        tokens = [t[:-1] if t.endswith('\r') else t for t in tokens]
+    return [t for t in tokens if t]
+
+
+def _split_chunks(data, sep):
+    # only decode up to the last separator of each chunk so that multibyte
+    # characters are never cut
+    rest = b''
+    for start in range(0, len(data), CHUNK_SIZE):
+        chunk = rest + data[start:start + CHUNK_SIZE]
+        end = chunk.rfind(sep) + 1
+        rest = chunk[end:]
+        for token in _split(chunk[:end], sep):
+            yield token
+    for token in _split(rest, sep):
+        yield token
+
+
+def _read_separated(f, sep):
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            for token in _split(f.read(), sep):
+                yield token
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for token in _split_chunks(data, sep):
+                yield token
+        finally:
+            data.close()
+
+
+def _read_shell(f):
+    with f:
+        lexer = shlex.shlex(f, posix=True)
+        lexer.whitespace_split = True
+        for token in lexer:
+            yield token
+
+
+def read_response_file(path, mode):
+    """Opens the response file at ``path`` and returns an iterator over
+    the arguments it contains.
+
+    :param str mode: ``'lines'`` for one argument per line, ``'nul'`` for
+        arguments separated by NUL characters, as produced by ``find
+        -print0``, or ``'shell'`` to split arguments like a POSIX shell
+        would, honouring quotes and comments. Empty lines and empty
+        NUL-separated arguments are skipped.
+    :raises: `IOError` if the file cannot be opened
+    """
+    if mode == 'shell':
+        return _read_shell(_open_text(path))
+    sep = b'\n' if mode == 'lines' else b'\0'
+    return _read_separated(open(path, 'rb'), sep)
+
+
+class _Failure(object):
+    def __init__(self, arg, error):
+        self.arg = arg
+        self.error = error
+
+    def exception(self):
+        return errors.BadResponseFile(self.arg[1:], self.error)
+
+
+def _expand(args, mode):
+    """Yields the arguments with the response files expanded, or a
+    `_Failure` in place of the ones that can't be read."""
+    for arg in args:
+        if len(arg) < 2 or arg[0] != '@':
+            yield arg
+            continue
+        try:
+            tokens = read_response_file(arg[1:], mode)
+            for token in tokens:
+                yield token
+        except (IOError, OSError, ValueError) as exc:
+            yield _Failure(arg, exc)
+
+
+class ResponseFileArguments(object):
+    """Read-only sequence of command-line arguments in which the arguments
+    starting with ``@`` are replaced with the contents of the response file
+    they name.
+
+    Response files are read as the sequence is iterated or indexed rather
+    than up front, so the parser only holds the arguments it has reached.
+    Response files cannot include other response files."""
+
+    def __init__(self, args, mode):
+        if mode not in MODES:
+            raise ValueError(
+                'Unknown response file mode {0!r}, expected one of {1}'
+                .format(mode, ', '.join(MODES)))
+        self.mode = mode
+        self._source = _expand(args, mode)
+        self._items = []
+
+    def _pull(self):
+        """Appends the next argument to the cache and returns `True`, or
+        returns `False` if all arguments were read."""
+        for item in self._source:
+            if isinstance(item, _Failure):
+                # keep the faulty argument in place so that arguments after
+                # it, like --help, can still be found
+                exc = item.exception()
+                exc.pos = len(self._items)
+                exc.val = item.arg
+                self._items.append(item.arg)
+                raise exc
+            self._items.append(item)
+            return True
+        return False
+
+    def _fill(self, index=None):
+        while index is None or len(self._items) <= index:
+            if not self._pull():
+                break
+
+    def drain(self, start):
+        """Returns an iterator over the arguments from ``start`` on. Unlike
+        iterating over the sequence, the arguments that weren't read yet are
+        not kept, and will be missing from the sequence afterwards."""
+        for arg in self._items[start:]:
+            yield arg
+        for item in self._source:
+            if isinstance(item, _Failure):
+                raise item.exception()
+            yield item
+
+    def __len__(self):
+        self._fill()
+        return len(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if (key.start or 0) < 0 or key.stop is None or key.stop < 0:
+                self._fill()
+            else:
+                self._fill(key.stop)
+            return tuple(self._items[key])
+        if key < 0:
+            self._fill()
+        else:
+            self._fill(key)
+        return self._items[key]
+
+    def __iter__(self):
+        i = 0
+        items = self._items
+        while i < len(items) or self._pull():
+            yield items[i]
+            i += 1
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(tuple(self))
@@ -0,0 +1,170 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+"""on-disk storage for objects that are expensive to rebuild at startup"""
+
+import os
+import sys
+import hashlib
+import inspect
+import tempfile
+import types
+from functools import partial
+
+import six
+from six.moves import cPickle as pickle
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_mtime, st.st_size
+
+
+_clize_stamp = None
+
+def clize_stamp():
+    """Identifies the installed version of clize."""
+    global _clize_stamp
+    if _clize_stamp is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        _clize_stamp = tuple(
+            (name, _file_stamp(os.path.join(here, name)))
+            for name in sorted(os.listdir(here))
+            if name.endswith('.py'))
+    return _clize_stamp
+
+
+_simple_types = (
+    type(None), bool, int, float, six.text_type, six.binary_type
+    ) + six.integer_types
+
+# inspect.Signature is missing on Python 2
+_signature_types = (
+    (inspect.Signature,) if hasattr(inspect, 'Signature') else ())
+
+
+def _describe(obj, depth=3):
+    """Describes ``obj`` in a way that is stable across runs, or raises
+    `ValueError`. Functions and classes are referred to by name."""
+    if isinstance(obj, _simple_types):
+        return repr(obj)
+    if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+        return obj.__module__, getattr(obj, '__qualname__', obj.__name__)
+    if not depth or isinstance(obj, types.MethodType):
+        raise ValueError(obj)
+    depth -= 1
+    if isinstance(obj, (tuple, list)):
+        return type(obj).__name__, tuple(_describe(x, depth) for x in obj)
+    if isinstance(obj, dict):
+        return 'dict', tuple(sorted(
+            (repr(k), _describe(v, depth)) for k, v in obj.items()))
+    if isinstance(obj, partial):
+        return 'partial', _describe((obj.func, obj.args, obj.keywords), depth)
+    if isinstance(obj, _signature_types):
+        return 'signature', tuple(
+            (p.name, str(p.kind), _describe(p.default, depth),
+             _describe(p.annotation, depth))
+            for p in obj.parameters.values())
+    ret = repr(obj)
+    if ' at 0x' in ret:
+        raise ValueError(obj)
+    return ret
+
+
+def _describe_code(func):
+    code = func.__code__
+    module = sys.modules.get(func.__module__)
+    return (
+        _describe(func), code.co_filename, code.co_firstlineno,
+        code.co_code, code.co_varnames,
+        _file_stamp(getattr(module, '__file__', None)),
+        )
+
+
+def _describe_layer(obj):
+    if isinstance(obj, types.FunctionType):
+        attrs = dict(obj.__dict__)
+        attrs.pop('__wrapped__', None)
+        return _describe_code(obj), _describe((
+            obj.__defaults__, getattr(obj, '__kwdefaults__', None),
+            getattr(obj, '__annotations__', None), attrs))
+    # a wrapper object: identify it by the functions it holds
+    attrs = []
+    for key, value in sorted(vars(obj).items()):
+        if isinstance(value, types.FunctionType):
+            attrs.append((key, _describe_code(value)))
+        elif isinstance(value, _simple_types + _signature_types):
+            attrs.append((key, _describe(value)))
+    return _describe(type(obj)), tuple(attrs)
+
+
+def func_key(func):
+    """Returns a ``(name, key)`` tuple for ``func``, or `None` if it cannot
+    be reliably identified across runs.
+
+    ``name`` identifies the function while ``key`` changes whenever the code,
+    annotations or defaults of it or the functions it wraps, the files
+    defining them, or clize itself change. Annotations and defaults must be
+    simple values, classes or functions."""
+    if not isinstance(func, types.FunctionType):
+        if (getattr(func, '__wrapped__', None) is None
+                or isinstance(func, types.MethodType)):
+            return None
+    layers = []
+    try:
+        while func is not None:
+            layers.append(_describe_layer(func))
+            func = getattr(func, '__wrapped__', None)
+    except (ValueError, TypeError, AttributeError):
+        return None
+    name = repr(layers[0][:2])
+    key = repr((layers, clize_stamp(), sys.version_info[:3]))
+    return name, key
+
+
+def _path(cache_dir, kind, name):
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, '{0}-{1}.pickle'.format(kind, digest))
+
+
+def load(cache_dir, kind, name, key):
+    """Returns the value stored for ``name`` if it was stored with the
+    same ``key``. Raises `KeyError` otherwise."""
+    try:
+        with open(_path(cache_dir, kind, name), 'rb') as f:
+            stored_key, value = pickle.load(f)
+    except Exception:
+        raise KeyError(name)
+    if stored_key != key:
+        raise KeyError(name)
+    return value
+
+
+def store(cache_dir, kind, name, key, value):
+    """Stores ``value`` for ``name`` and ``key``. Values that cannot be
+    pickled, as well as I/O errors, are silently ignored."""
+    try:
+        data = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            _replace(tmp, _path(cache_dir, kind, name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (IOError, OSError):
+        return False
+    return True
+
+
+_replace = getattr(os, 'replace', os.rename)
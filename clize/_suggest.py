@@ -0,0 +1,115 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+"""suggestions of known names close to a mistyped one"""
+
+
+def distance(a, b):
+    """Returns the Levenshtein distance between ``a`` and ``b``, the
+    amount of characters to insert, delete or replace to turn one into the
+    other."""
+    # bit-parallel computation after Myers (1999) and Hyyrö (2003): bit i of
+    # pv and mv tells whether the distance increases or decreases between
+    # rows i and i + 1 of the current column of the usual matrix
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    peq = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | 1 << i
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    pv = full
+    mv = 0
+    score = len(b)
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1 | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | ~(xv | ph) & full
+        mv = ph & xv
+    return score
+
+
+def max_distance(word):
+    """The largest distance at which names are suggested for ``word``.
+
+    Short words have no suggestions, as nearly any other short name would
+    be as close."""
+    return len(word) // 3
+
+
+class Index(object):
+    """Finds the names closest to a given word among ``names``.
+
+    The first lookup compares the word with every name. Later ones use a
+    BK-tree of the names, built then, as it costs several lookups' worth of
+    comparisons. Successful command lines pay for neither. ``names`` may be
+    any iterable, like a `dict`, and is only read when looking up a word."""
+
+    def __init__(self, names):
+        self.names = names
+        self.lookups = 0
+        self._root = None
+
+    def _build(self):
+        root = None
+        for name in self.names:
+            if root is None:
+                root = (name, {})
+                continue
+            node = root
+            while True:
+                d = distance(name, node[0])
+                if not d:
+                    break
+                child = node[1].get(d)
+                if child is None:
+                    node[1][d] = (name, {})
+                    break
+                node = child
+        return root
+
+    def _scan(self, word, radius):
+        for name in self.names:
+            # the distance is at least the difference in length
+            if abs(len(name) - len(word)) <= radius:
+                d = distance(word, name)
+                if d <= radius:
+                    yield d, name
+
+    def _search(self, word, radius):
+        if self._root is None:
+            self._root = self._build()
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            name, children = stack.pop()
+            d = distance(word, name)
+            if d <= radius:
+                yield d, name
+            # by the triangle inequality, only the children whose distance to
+            # this node is within radius of d can be close enough to word
+            for key, child in children.items():
+                if d - radius <= key <= d + radius:
+                    stack.append(child)
+
+    def closest(self, word, limit=3):
+        """Returns up to ``limit`` names that are the closest to ``word``,
+        closest first, or an empty list if none are close enough."""
+        radius = max_distance(word)
+        self.lookups += 1
+        if self.lookups == 1:
+            found = sorted(self._scan(word, radius))
+        else:
+            found = sorted(self._search(word, radius))
+        return [name for d, name in found[:limit]]
@@ -0,0 +1,647 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+"""compiles command-line interfaces into standalone parser modules
+
+The generated module parses arguments the way `.CliBoundArguments` does for
+the compiled signatures, without importing sigtools or the parameter classes.
+Alternate actions such as ``--help``, as well as any incorrect command line,
+are handed over to clize itself so that their output is unchanged::
+
+    $ python -m clize.compile mypkg.cli:main -o mypkg/_cli_fast.py
+
+Then use ``mypkg._cli_fast:main`` as the program's entry point. The module
+must be generated again whenever the command-line interface changes.
+"""
+
+from __future__ import print_function
+
+import ast
+import inspect
+import importlib
+
+import six
+from sigtools.modifiers import annotate, kwoargs
+
+from clize import parser, parameters, runner
+
+
+_runtime = '''
+import os
+import sys
+
+from clize import errors, _suggest
+
+
+_POS, _VARARGS, _OPTION, _INTOPTION, _FLAG, _MULTIOPTION, _NAME, \\
+    _NAMEDNAME, _FALLBACK, _ALTERNATE = range(10)
+
+
+class _Defer(Exception):
+    """Raised when clize itself must process the arguments."""
+
+
+class _Param(object):
+    """Stands in for a clize parameter in error messages."""
+
+    def __init__(self, kind, display_name, argument_name=None, aliases=None,
+                 conv=None, value=None, min=0, max=None, required=False,
+                 last_option=False):
+        self.kind = kind
+        self.display_name = display_name
+        self.argument_name = argument_name
+        self.aliases = aliases
+        self.conv = conv
+        self.value = value
+        self.min = min
+        self.max = max
+        self.required = required
+        self.last_option = last_option
+
+
+class _Signature(object):
+    def __init__(self, params):
+        self.params = params
+        self.positional = []
+        self.aliases = {}
+        self.required = set()
+        for param in params:
+            if param.required:
+                self.required.add(param)
+            if param.aliases is not None:
+                for alias in param.aliases:
+                    self.aliases[alias] = param
+            elif param.kind < _FALLBACK:
+                self.positional.append(param)
+        self.index = _suggest.Index(self.aliases)
+
+
+class _Command(object):
+    def __init__(self, sig, func):
+        self.sig = sig
+        self.func = func
+
+
+class _Dispatch(object):
+    def __init__(self, commands):
+        self.commands = commands
+
+
+class _State(object):
+    def __init__(self, sig, in_args, name):
+        self.sig = sig
+        self.in_args = list(in_args)
+        self.name = name
+        self.args = []
+        self.kwargs = {}
+        self.posidx = 0
+        self.sticky = None
+        self.posarg_only = False
+        self.skip = 0
+        self.unsatisfied = set(sig.required)
+
+    def next_positional(self):
+        try:
+            param = self.sig.positional[self.posidx]
+        except IndexError:
+            return None
+        self.posidx += 1
+        return param
+
+
+def _context(exc, **attributes):
+    for key, value in attributes.items():
+        if not hasattr(exc, key):
+            setattr(exc, key, value)
+
+
+def _coerce(param, arg):
+    if param.conv is None:
+        return arg
+    try:
+        return param.conv(arg)
+    except errors.CliValueError as e:
+        exc = errors.BadArgumentFormat(e)
+        exc.__cause__ = e
+        raise exc
+    except ValueError as e:
+        exc = errors.BadArgumentFormat(repr(arg))
+        exc.__cause__ = e
+        raise exc
+
+
+def _is_true(arg):
+    return arg.lower() not in ('', '0', 'n', 'no', 'f', 'false')
+
+
+def _split_int_rest(s):
+    for i, c, in enumerate(s):
+        if not c.isdigit() and c != '-':
+            return s[:i], s[i:]
+    return s, ''
+
+
+def _get_value(st, i):
+    arg = st.in_args[i]
+    if arg.startswith('--'):
+        name, glued, val = arg.partition('=')
+    else:
+        arg = arg.lstrip('-')
+        if len(arg) > 1:
+            glued = True
+            val = arg[1:]
+        else:
+            glued = False
+    if not glued:
+        try:
+            val = st.in_args[i+1]
+        except IndexError:
+            raise errors.MissingValue
+    st.skip = not glued
+    return val
+
+
+def _read_option(param, st, i):
+    if param.argument_name in st.kwargs:
+        raise errors.DuplicateNamedArgument()
+    st.kwargs[param.argument_name] = _coerce(param, _get_value(st, i))
+
+
+def _redispatch(rest, st, i):
+    if not rest:
+        return
+    param = st.sig.aliases.get('-' + rest[0])
+    if param is None:
+        raise errors.UnknownOption('-' + rest[0], st.sig.index)
+    orig_arg = st.in_args[i]
+    st.in_args[i] = '-' + rest
+    try:
+        _read_argument(param, st, i)
+    finally:
+        st.in_args[i] = orig_arg
+    st.unsatisfied.discard(param)
+
+
+def _read_argument(param, st, i):
+    kind = param.kind
+    if kind == _POS:
+        st.args.append(_coerce(param, st.in_args[i]))
+    elif kind == _OPTION:
+        _read_option(param, st, i)
+    elif kind == _FLAG:
+        arg = st.in_args[i]
+        if arg[1] == '-':
+            name, sep, val = arg.partition('=')
+            st.kwargs[param.argument_name] = (
+                _coerce(param, val) if sep else param.value)
+        else:
+            st.kwargs[param.argument_name] = param.value
+            _redispatch(arg[2:], st, i)
+    elif kind == _INTOPTION:
+        if param.argument_name in st.kwargs:
+            raise errors.DuplicateNamedArgument()
+        arg = st.in_args[i]
+        if arg.startswith('--'):
+            return _read_option(param, st, i)
+        arg = arg.lstrip('-')[1:]
+        if not arg:
+            return _read_option(param, st, i)
+        val, rest = _split_int_rest(arg)
+        st.kwargs[param.argument_name] = _coerce(param, val)
+        _redispatch(rest, st, i)
+    elif kind == _VARARGS or kind == _MULTIOPTION:
+        if kind == _VARARGS:
+            val = _coerce(param, st.in_args[i])
+            col = st.args
+        else:
+            val = _coerce(param, _get_value(st, i))
+            col = st.kwargs.setdefault(param.argument_name, [])
+        col.append(val)
+        if param.min <= len(col):
+            st.unsatisfied.discard(param)
+        if param.max is not None and param.max < len(col):
+            raise errors.TooManyValues
+    elif kind == _NAME:
+        st.args.append(st.name)
+        nparam = st.next_positional()
+        if nparam is None:
+            raise errors.TooManyArguments(st.in_args[i])
+        try:
+            _read_argument(nparam, st, i)
+            _apply_generic_flags(nparam, st)
+        except errors.ArgumentError as exc:
+            _context(exc, param=nparam)
+            raise
+    else:
+        raise _Defer
+
+
+def _apply_generic_flags(param, st):
+    if param.last_option:
+        st.posarg_only = True
+    if param.kind == _VARARGS:
+        st.sticky = param
+    elif param.kind != _MULTIOPTION:
+        st.unsatisfied.discard(param)
+
+
+def _unsatisfied(param, st):
+    if param.kind == _VARARGS:
+        if not st.args or len(st.unsatisfied) > 1:
+            return True
+        raise errors.NotEnoughValues
+    elif param.kind == _MULTIOPTION:
+        if not st.kwargs.get(param.argument_name):
+            return True
+        raise errors.NotEnoughValues
+    elif param.kind == _NAME:
+        st.args.append(st.name)
+    elif param.kind == _NAMEDNAME:
+        st.kwargs[param.argument_name] = st.name
+    else:
+        return True
+
+
+def _read(sig, args, name):
+    """Returns ``(func, post_name, args, kwargs)`` like iterating over a
+    `clize.parser.CliBoundArguments` instance would. Raises `_Defer` if an
+    alternate action was requested."""
+    st = _State(sig, args, name)
+    in_args = st.in_args
+    try:
+        for i, arg in enumerate(in_args):
+            if st.skip > 0:
+                st.skip -= 1
+                continue
+            try:
+                if st.posarg_only or len(arg) < 2 or arg[0] != '-':
+                    param = st.sticky or st.next_positional()
+                    if param is None:
+                        exc = errors.TooManyArguments(tuple(in_args[i:]))
+                        exc.__cause__ = None
+                        raise exc
+                elif arg == '--':
+                    st.posarg_only = True
+                    continue
+                else:
+                    if arg.startswith('--'):
+                        key = arg.partition('=')[0]
+                    else:
+                        key = arg[:2]
+                    param = sig.aliases.get(key)
+                    if param is None:
+                        raise errors.UnknownOption(key, sig.index)
+                try:
+                    _read_argument(param, st, i)
+                    _apply_generic_flags(param, st)
+                except errors.ArgumentError as exc:
+                    _context(exc, param=param)
+                    raise
+            except errors.ArgumentError as exc:
+                _context(exc, pos=i, val=arg)
+                raise
+    except errors.ArgumentError as exc:
+        for arg in in_args[exc.pos + 1:]:
+            param = sig.aliases.get(arg)
+            if param is not None and param.kind == _FALLBACK:
+                raise _Defer
+        raise
+
+    if st.unsatisfied:
+        missing = []
+        for param in sig.params:
+            if param in st.unsatisfied:
+                try:
+                    if _unsatisfied(param, st):
+                        missing.append(param)
+                except errors.ArgumentError as exc:
+                    _context(exc, param=param)
+                    raise
+        if missing:
+            raise errors.MissingRequiredArguments(missing)
+
+    for param in sig.params:
+        if param.kind == _MULTIOPTION:
+            st.kwargs.setdefault(param.argument_name, [])
+
+    return None, [], st.args, st.kwargs
+'''
+
+
+_runtime_main = '''
+
+_loaded = {}
+
+def _load(path):
+    try:
+        return _loaded[path]
+    except KeyError:
+        pass
+    modname, _, attrs = path.partition(':')
+    obj = __import__(modname, fromlist=['_'])
+    for attr in attrs.split('.'):
+        obj = getattr(obj, attr)
+    _loaded[path] = obj
+    return obj
+
+
+def _read_commandline(node, args):
+    if isinstance(node, _Dispatch):
+        if len(args) < 2 or (len(args[1]) >= 2 and args[1][0] == '-'):
+            raise _Defer
+        command = args[1].lower()
+        try:
+            sub = node.commands[command]
+        except KeyError:
+            raise _Defer
+        func, name, posargs, kwargs, path = _read_commandline(
+            sub, ('{0} {1}'.format(args[0], command),) + tuple(args[2:]))
+        return func, name, posargs, kwargs, (command,) + path
+    try:
+        _, _, posargs, kwargs = _read(node.sig, args[1:], args[0])
+    except errors.ArgumentError:
+        raise _Defer
+    return _load(node.func), args[0], posargs, kwargs, ()
+
+
+def _full_cli(path):
+    from clize.runner import Clize, LazyCommand
+    cli = Clize.get_cli(_load(_TARGET))
+    for command in path:
+        cli = cli.func.__self__.cmds_by_name[command]
+        if isinstance(cli, LazyCommand):
+            cli = cli.command
+    return cli
+
+
+def _get_executable(path, default):
+    if not path:
+        return default
+    if path.endswith('.py'):
+        return path
+    basename = os.path.basename(path)
+    try:
+        from shutil import which
+    except ImportError:
+        which = None
+    else:
+        if which(basename) == path:
+            return basename
+    rel = os.path.relpath(path)
+    if rel.startswith('../'):
+        if which is None and os.path.isabs(path):
+            return basename
+        return path
+    return rel
+
+
+def main(args=None):
+    """Runs the command line like `clize.run` would."""
+    try:
+        if args is None:
+            if not sys.path[0]:
+                raise _Defer
+            args = [_get_executable(sys.argv[0], sys.argv[0])] + sys.argv[1:]
+        func, name, posargs, kwargs, path = _read_commandline(_ROOT, args)
+    except _Defer:
+        from clize import run
+        return run(_load(_TARGET), args=args)
+    try:
+        ret = func(*posargs, **kwargs)
+    except errors.UserError as exc:
+        _context(exc, pname=name)
+        if isinstance(exc, errors.ArgumentError):
+            _context(exc, cli=_full_cli(path))
+        print(str(exc), file=sys.stderr)
+        sys.exit(2 if isinstance(exc, errors.ArgumentError) else 1)
+    if ret is not None:
+        print(ret)
+    sys.exit()
+'''
+
+
+def _pass_name_factory():
+    return parameters.pass_name.args[-1]['value_factory']
+
+
+def _is_async(func):
+    return any(
+        getattr(inspect, name, lambda func: False)(func)
+        for name in ('iscoroutinefunction', 'isasyncgenfunction'))
+
+
+def _kind(param):
+    typ = type(param)
+    if isinstance(param, parser.AlternateCommandParameter):
+        return '_ALTERNATE'
+    elif isinstance(param, parser.FallbackCommandParameter):
+        return '_FALLBACK'
+    elif typ is parser.PositionalParameter:
+        return '_POS'
+    elif typ is parser.ExtraPosArgsParameter:
+        return '_VARARGS'
+    elif typ is parser.OptionParameter:
+        return '_OPTION'
+    elif typ is parser.IntOptionParameter:
+        return '_INTOPTION'
+    elif typ is parser.FlagParameter:
+        return '_FLAG'
+    elif typ is parameters.MultiOptionParameter:
+        return '_MULTIOPTION'
+    elif (typ is parameters.InserterPositionalParameter
+            and param.value_factory is _pass_name_factory()):
+        return '_NAME'
+    elif (typ is parameters.InserterNamedParameter
+            and param.value_factory is _pass_name_factory()):
+        return '_NAMEDNAME'
+    raise ValueError(
+        "Cannot compile parameter {0} of type {1}".format(
+            param.display_name, typ.__name__))
+
+
+def _literal(value):
+    ret = repr(value)
+    try:
+        if ast.literal_eval(ret) == value:
+            return ret
+    except (ValueError, SyntaxError):
+        pass
+    raise ValueError("Cannot write {0!r} in the generated module".format(value))
+
+
+def _find(obj):
+    """Returns the ``module:attribute`` path under which ``obj`` can be
+    imported, or raises `ValueError`."""
+    modname = getattr(obj, '__module__', None)
+    qualname = getattr(obj, '__qualname__', getattr(obj, '__name__', None))
+    if modname is not None and qualname is not None:
+        try:
+            found = importlib.import_module(modname)
+            for attr in qualname.split('.'):
+                found = getattr(found, attr)
+        except (ImportError, AttributeError):
+            pass
+        else:
+            if found is obj:
+                return '{0}:{1}'.format(modname, qualname)
+            elif getattr(found, 'func', None) is obj:
+                return '{0}:{1}.func'.format(modname, qualname)
+    raise ValueError("Cannot find {0!r} by name".format(obj))
+
+
+class _Writer(object):
+    def __init__(self):
+        self.imports = []
+        self.convs = {}
+        self.sigs = []
+
+    def conv(self, conv):
+        if conv is parser.is_true:
+            return '_is_true'
+        elif getattr(six.moves.builtins, getattr(conv, '__name__', ''),
+                     None) is conv:
+            return conv.__name__
+        try:
+            return self.convs[conv]
+        except KeyError:
+            pass
+        modname, _, qualname = _find(conv).partition(':')
+        name = self.convs[conv] = '_conv{0}'.format(len(self.convs))
+        first, dot, rest = qualname.partition('.')
+        self.imports.append(
+            'from {0} import {1} as {2}'.format(modname, first, name))
+        return name + dot + rest
+
+    def param(self, param):
+        kind = _kind(param)
+        args = [kind, _literal(param.display_name)]
+        kwargs = [
+            ('argument_name', getattr(param, 'argument_name', None), None),
+            ('aliases', getattr(param, 'aliases', None), None),
+            ('required', bool(getattr(param, 'required', False)), False),
+            ('last_option', bool(param.last_option), False),
+            ]
+        if kind in ('_VARARGS', '_MULTIOPTION'):
+            kwargs.extend([('min', param.min, 0), ('max', param.max, None)])
+        if kind == '_FLAG':
+            kwargs.append(('value', param.value, None))
+        args.extend(
+            '{0}={1}'.format(key, _literal(value))
+            for key, value, default in kwargs if value != default)
+        conv = getattr(param, 'conv', parser.identity)
+        if conv is not parser.identity and kind not in ('_FALLBACK', '_ALTERNATE'):
+            args.append('conv=' + self.conv(conv))
+        return '_Param({0})'.format(', '.join(args))
+
+    def signature(self, csig):
+        if csig.abbreviations:
+            raise ValueError('Abbreviated long options are not supported')
+        params = list(csig.parameters.values())
+        for param in csig.positional + csig.named + csig.alternate:
+            if not any(param is p for p in params):
+                raise ValueError(
+                    "Cannot compile parameter {0}: its name is used twice"
+                    .format(param.display_name))
+        name = '_sig{0}'.format(len(self.sigs))
+        self.sigs.append('{0} = _Signature([\n{1}])'.format(
+            name, ''.join(
+                '    {0},\n'.format(self.param(p)) for p in params)))
+        return name
+
+    def command(self, cli, indent='    '):
+        if isinstance(cli, runner.LazyCommand):
+            cli = cli.command
+        dispatcher = getattr(cli.func, '__self__', None)
+        if isinstance(dispatcher, runner.SubcommandDispatcher):
+            return '_Dispatch({{\n{0}{1}}})'.format(''.join(
+                '{0}    {1!r}: {2},\n'.format(
+                    indent, name, self.command(sub, indent + '    '))
+                for name, sub in sorted(dispatcher.cmds_by_name.items())
+                ), indent)
+        if getattr(cli, 'response_files', None):
+            raise ValueError(
+                'Response files are not supported: {0!r}'.format(cli))
+        if _is_async(cli.func):
+            raise ValueError(
+                'Asynchronous functions are not supported: {0!r}'.format(cli))
+        return '_Command({0}, {1!r})'.format(
+            self.signature(cli.signature), _find(cli.func))
+
+    def source(self, target, *parts):
+        return '\n'.join([
+            '# Generated by clize.compile from {0}. Do not edit.'.format(
+                target),
+            '',
+            'from __future__ import print_function',
+            ] + self.imports + [
+            _runtime,
+            '\n\n'.join(self.sigs),
+            ] + list(parts))
+
+
+def compile_signature(csig):
+    """Returns the source of a module that parses arguments for ``csig``.
+
+    The module's ``read_arguments(args, name)`` function returns a
+    ``(func, post_name, args, kwargs)`` tuple like iterating over
+    ``csig.read_arguments(args, name)`` does. It returns `None` when an
+    alternate action such as ``--help`` was requested.
+
+    :param .CliSignature csig: The signature to compile.
+    :raises ValueError: if a parameter or converter cannot be compiled.
+    """
+    writer = _Writer()
+    sig = writer.signature(csig)
+    return writer.source('a CliSignature', '''
+
+def read_arguments(args, name):
+    try:
+        return _read({0}, args, name)
+    except _Defer:
+        return None
+
+'''.format(sig))
+
+
+def compile_target(target):
+    """Returns the source of a module whose ``main()`` function runs the
+    :ref:`cli object<cli-object>` named by ``target`` like `clize.run`
+    would.
+
+    :param str target: The object to compile, as ``"package.module:name"``.
+    :raises ValueError: if a parameter or converter cannot be compiled.
+    """
+    modname, sep, attr = target.partition(':')
+    if not sep:
+        raise ValueError('Expected "package.module:name", got ' + target)
+    obj = importlib.import_module(modname)
+    for name in attr.split('.'):
+        obj = getattr(obj, name)
+    writer = _Writer()
+    root = writer.command(runner.Clize.get_cli(obj))
+    return writer.source(target, _runtime_main, '''
+_TARGET = {0!r}
+
+_ROOT = {1}
+'''.format(target, root))
+
+
+@kwoargs('output')
+@annotate(output='o')
+def main(target, output=None):
+    """Compiles a command-line interface into a standalone parser module
+
+    target: The object to compile, as package.module:name
+
+    output: The file to write the module to. Prints it if unspecified.
+    """
+    source = compile_target(target)
+    if output is None:
+        return source
+    with open(output, 'w') as f:
+        f.write(source)
+
+
+if __name__ == '__main__':
+    runner.run(main)
@@ -4,58 +4,611 @@
 
 import io
 import os
+import re
+import sys
+import stat
+import fnmatch
+import mmap as mmap_
+import datetime as datetime_
 from functools import partial
 
 from clize import parser, errors
 
 
+_timezone = getattr(datetime_, 'timezone', None)
+_fromisoformat = getattr(datetime_.datetime, 'fromisoformat', None)
+_scandir = getattr(os, 'scandir', None)
+
+# dateutil rejects bare numbers of 9 to 11 digits, but reads longer ones
+# such as 202610161230 as compact dates
+_epoch = re.compile(r'^(?:@-?\d+|\d{9,11})(?:\.\d+)?$')
+_slashed = re.compile(
+    r'^(\d{4})/(\d{1,2})/(\d{1,2})'
+    r'(?:[ T](\d{1,2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?)?$')
+_common_log = re.compile(
+    r'^(\d{1,2})/([A-Z][a-z]{2})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) '
+    r'([+-])(\d{2})(\d{2})$')
+_months = dict(
+    (name, i) for i, name in enumerate(
+        'Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec'.split(), 1))
+
+
+def _parse_datetime(arg):
+    """Parses ISO 8601 dates and times, epoch seconds prefixed with ``@`` or
+    of 9 to 11 digits, ``YYYY/MM/DD [HH:MM[:SS]]`` and the common log
+    format. Returns `None` for other formats."""
+    try:
+        if _epoch.match(arg) and _timezone is not None:
+            return datetime_.datetime.fromtimestamp(
+                float(arg.lstrip('@')), _timezone.utc)
+        if _fromisoformat is not None:
+            try:
+                return _fromisoformat(arg)
+            except ValueError:
+                pass
+        match = _slashed.match(arg)
+        if match:
+            year, month, day, h, m, s, frac = match.groups()
+            return datetime_.datetime(
+                int(year), int(month), int(day), int(h or 0), int(m or 0),
+                int(s or 0), int((frac or '0').ljust(6, '0')))
+        match = _common_log.match(arg)
+        if match and _timezone is not None:
+            day, month, year, h, m, s, sign, tzh, tzm = match.groups()
+            offset = datetime_.timedelta(hours=int(tzh), minutes=int(tzm))
+            return datetime_.datetime(
+                int(year), _months[month], int(day), int(h), int(m), int(s),
+                tzinfo=_timezone(-offset if sign == '-' else offset))
+    except (ValueError, KeyError, OverflowError, OSError):
+        pass
+    return None
+
+
 @parser.value_converter(name='TIME')
 def datetime(arg):
+    """Converts ISO 8601 dates and times, epoch seconds written as ``@N``,
+    and a few other common formats itself, and leaves the others to
+    ``dateutil.parser.parse``, which is only imported then."""
+    ret = _parse_datetime(arg)
+    if ret is not None:
+        return ret
     from dateutil import parser as dparser
 
     return dparser.parse(arg)
 
 
+@parser.value_converter(name='TIME')
+def strict_datetime(arg):
+    """Like `datetime`, but never uses ``dateutil``, and rejects the values
+    it can't convert itself."""
+    ret = _parse_datetime(arg)
+    if ret is None:
+        raise ValueError(arg)
+    return ret
+
+
+_advice = {
+    'sequential': 'POSIX_FADV_SEQUENTIAL',
+    'random': 'POSIX_FADV_RANDOM',
+    'willneed': 'POSIX_FADV_WILLNEED',
+    }
+
+
+def _advise(f, mapped, advice):
+    """Passes ``advice`` on to the kernel, if it supports it. Failures are
+    ignored since the advice is only a hint."""
+    flag = getattr(os, _advice[advice], None)
+    if flag is not None:
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, flag)
+        except OSError:
+            pass
+    madvise = getattr(mapped, 'madvise', None)
+    flag = getattr(mmap_, _advice[advice].replace('POSIX_FADV', 'MADV'), None)
+    if madvise is not None and flag is not None:
+        try:
+            madvise(flag)
+        except OSError:
+            pass
+
+
+def _writable(path):
+    return os.access(path, os.W_OK)
+
+
+def _validate_permissions(arg, mode, exists, dir_writable=_writable):
+    if not exists:
+        if 'r' in mode and '+' not in mode:
+            raise errors.CliValueError(
+                'File does not exist: {0!r}'.format(arg))
+        else:
+            dirname = os.path.dirname(arg)
+            if dir_writable(dirname):
+                return
+            if not os.path.exists(dirname):
+                raise errors.CliValueError(
+                    'Directory does not exist: {0!r}'.format(arg))
+    elif os.access(arg, os.W_OK):
+        return
+    raise errors.CliValueError(
+        'Permission denied: {0!r}'.format(arg))
+
+
 class _FileOpener(object):
-    def __init__(self, arg, kwargs):
+    def __init__(self, arg, kwargs, mmap=False, advice=None, stdio=None,
+                 validate=True):
         self.arg = arg
         self.kwargs = kwargs
-        self.validate_permissions()
+        self.mmap = mmap
+        self.advice = advice
+        self.stdio = stdio is not None and arg == stdio
+        if validate and not self.stdio:
+            self.validate_permissions()
 
     def validate_permissions(self):
-        mode = self.kwargs.get('mode', 'r')
-        exists = os.access(self.arg, os.F_OK)
-        if not exists:
-            if 'r' in mode and '+' not in mode:
-                raise errors.CliValueError(
-                    'File does not exist: {0!r}'.format(self.arg))
-            else:
-                dirname = os.path.dirname(self.arg)
-                if os.access(dirname, os.W_OK):
-                    return
-                if not os.path.exists(dirname):
-                    raise errors.CliValueError(
-                        'Directory does not exist: {0!r}'.format(self.arg))
-        elif os.access(self.arg, os.W_OK):
-            return
-        raise errors.CliValueError(
-            'Permission denied: {0!r}'.format(self.arg))
+        _validate_permissions(
+            self.arg, self.kwargs.get('mode', 'r'),
+            os.access(self.arg, os.F_OK))
 
     def __enter__(self):
+        self.f = self.mapped = None
+        self.owned = True
+        data = b''
         try:
-            self.f = io.open(self.arg, **self.kwargs)
-        except IOError as exc:
+            if self.stdio:
+                self.f = self.open_stdio()
+            else:
+                self.f = io.open(self.arg, **self.kwargs)
+            if self.mmap:
+                st = os.fstat(self.f.fileno())
+                if not stat.S_ISREG(st.st_mode):
+                    # pipes and terminals report no size and can't be
+                    # mapped, eg. when the standard input is a pipe
+                    data = self.f.read()
+                elif st.st_size:
+                    self.mapped = mmap_.mmap(
+                        self.f.fileno(), 0, access=mmap_.ACCESS_READ)
+        except (IOError, OSError) as exc:
+            if self.f is not None and self.owned:
+                self.f.close()
             raise _convert_ioerror(self.arg, exc)
+        if self.advice is not None:
+            _advise(self.f, self.mapped, self.advice)
+        if self.mmap:
+            # empty files cannot be mapped
+            return self.mapped if self.mapped is not None else data
         return self.f
 
+    def open_stdio(self):
+        """Returns the standard input, or the standard output if the mode
+        writes, in binary form if the mode is binary. With other arguments
+        for `io.open`, such as ``buffering``, its file descriptor is opened
+        again without being closed afterwards."""
+        mode = self.kwargs.get('mode', 'r')
+        stream = sys.stdout if set(mode) & set('wax+') else sys.stdin
+        if set(self.kwargs) - set(['mode']):
+            stream.flush()
+            return io.open(stream.fileno(), closefd=False, **self.kwargs)
+        self.owned = False
+        if 'b' in mode:
+            return getattr(stream, 'buffer', stream)
+        return stream
+
     def __exit__(self, *exc_info):
-        self.f.close()
+        try:
+            if self.mapped is not None:
+                self.mapped.close()
+        finally:
+            if self.owned:
+                self.f.close()
+            else:
+                # the process's standard streams are left open
+                self.f.flush()
+
+
+def file(mmap=False, advice=None, stdio='-', validate=True, **kwargs):
+    """Creates a value converter for parameters that receive a file. The
+    parameter receives a context manager that opens the file when entered
+    and closes it on exit. The file must exist if it is only read, and be
+    writable otherwise.
+
+    :param str stdio: The argument that stands for the standard input, or
+        the standard output if ``mode`` writes, or `None`. With a binary
+        ``mode``, the context manager gives the underlying binary stream,
+        eg. ``sys.stdin.buffer``. With ``buffering`` or other arguments,
+        the stream's file descriptor is opened again with them. The
+        standard streams are flushed, not closed, on exit.
 
-def file(**kwargs):
+    :param bool mmap: Instead of a file object, the context manager gives
+        a read-only `mmap.mmap` of the whole file, or ``b''`` if it is
+        empty. Pipes, such as the standard input often is, are read into
+        `bytes` instead. Use `memoryview` on it to slice it without copying, and
+        release the view before the context manager exits.
+    :param str advice: Tells the kernel how the file will be read, where
+        `os.posix_fadvise` or `mmap.mmap.madvise` are available:
+        ``'sequential'``, ``'random'`` or ``'willneed'``.
+    :param bool validate: Whether to check the file's permissions when the
+        argument is converted. See also `files`.
+    :param kwargs: Passed on to `io.open`, eg. ``mode``, ``encoding`` or
+        ``buffering``.
+    """
+    if advice is not None and advice not in _advice:
+        raise ValueError(
+            'Unknown advice {0!r}, expected one of {1}'.format(
+                advice, ', '.join(sorted(_advice))))
+    if mmap:
+        mode = kwargs.setdefault('mode', 'rb')
+        if set(mode) - set('rb'):
+            raise ValueError(
+                'Memory-mapped files can only be read, got mode {0!r}'
+                .format(mode))
+        kwargs['mode'] = 'rb'
     return parser.value_converter(
-        partial(_FileOpener, kwargs=kwargs),
+        partial(_FileOpener, kwargs=kwargs, mmap=mmap, advice=advice,
+                stdio=stdio, validate=validate),
         name='FILE')
 
+
+def _scan(dirname):
+    """Returns the names in ``dirname`` other than symbolic links, or `None`
+    if it can't be listed."""
+    if _scandir is None:
+        return None
+    try:
+        return set(
+            entry.name for entry in _scandir(dirname or os.curdir)
+            if not entry.is_symlink())
+    except OSError:
+        return None
+
+
+# below this many files per thread, the pool costs more than it saves
+_min_chunk = 64
+
+
+def _check_chunk(items, listings, mode, dir_writable):
+    access = os.access
+    for i, dirname, name, arg in items:
+        names = listings[dirname]
+        if names is not None and name in names:
+            if access(arg, os.W_OK):
+                continue
+            exists = True
+        else:
+            # also covers symbolic links, paths ending with a separator and
+            # case-insensitive filesystems
+            exists = access(arg, os.F_OK)
+        try:
+            _validate_permissions(arg, mode, exists, dir_writable)
+        except errors.CliValueError as exc:
+            return i, exc
+    return None
+
+
+def _validate_all(openers, jobs):
+    """Checks the permissions of many `_FileOpener`, listing each directory
+    once to find which files exist and checking the rest in a thread pool.
+    Returns the index and error of the first one that fails, or `None`."""
+    mode = openers[0].kwargs.get('mode', 'r')
+    items = []
+    counts = {}
+    sep = os.sep
+    for i, opener in enumerate(openers):
+        if not opener.stdio:
+            arg = opener.arg
+            # faster than os.path.split, paths it doesn't split the same
+            # way just aren't found in the listing
+            dirname, found, name = arg.rpartition(sep)
+            dirname = dirname or found
+            counts[dirname] = counts.get(dirname, 0) + 1
+            items.append((i, dirname, name, arg))
+    # listing a directory for a handful of its files costs more than it saves
+    dirnames = [d for d, count in counts.items() if count >= _min_chunk]
+    chunksize = max(_min_chunk, len(items) // (4 * (jobs or 8)))
+    if jobs == 1 or len(items) <= chunksize:
+        pool = None
+        map_ = map
+    else:
+        from concurrent import futures
+        pool = futures.ThreadPoolExecutor(jobs or 8)
+        map_ = pool.map
+    try:
+        listings = dict.fromkeys(counts)
+        listings.update(zip(dirnames, map_(_scan, dirnames)))
+        writable = {}
+        def dir_writable(dirname):
+            try:
+                return writable[dirname]
+            except KeyError:
+                ret = writable[dirname] = _writable(dirname)
+                return ret
+        results = map_(
+            lambda start: _check_chunk(
+                items[start:start + chunksize], listings, mode,
+                dir_writable),
+            range(0, len(items), chunksize))
+        for result in results:
+            if result is not None:
+                return result
+        return None
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+class FilesParameter(parser.ExtraPosArgsParameter):
+    """Parameter that collects the remaining positional arguments as files
+    like `file` does, but checks their permissions all at once after the
+    arguments are read."""
+
+    def __init__(self, file_kwargs, jobs, conv=None, **kwargs):
+        super(FilesParameter, self).__init__(
+            conv=file(validate=False, **file_kwargs), **kwargs)
+        self.jobs = jobs
+
+    def read_argument(self, ba, i):
+        try:
+            ba.meta[self.argument_name].append(i)
+        except KeyError:
+            ba.meta[self.argument_name] = [i]
+        super(FilesParameter, self).read_argument(ba, i)
+
+    def post_parse(self, ba):
+        positions = ba.meta.get(self.argument_name)
+        if not positions:
+            return
+        openers = ba.args[-len(positions):]
+        failed = _validate_all(openers, self.jobs)
+        if failed is not None:
+            i, e = failed
+            exc = errors.BadArgumentFormat(e)
+            exc.__cause__ = e
+            parser._set_error_context(
+                exc, param=self, pos=positions[i], val=openers[i].arg, ba=ba)
+            raise exc
+
+
+def files(jobs=None, **kwargs):
+    """For ``*args``-like parameters, converts each argument like `file`,
+    but checks all the files once every argument is read, grouped by
+    directory, with a pool of ``jobs`` threads. This avoids several system
+    calls per file when there are many. The first file that fails is
+    reported with its position.
+
+    Other arguments are passed to `file`.
+    """
+    return parser.use_class(varargs=FilesParameter, kwargs={
+        'file_kwargs': kwargs,
+        'jobs': jobs,
+        })
+
+
+_magic = re.compile(r'[*?[]')
+
+
+def _braces(pattern, start=0):
+    """Expands the ``{a,b}`` alternatives of ``pattern`` from ``start``, in
+    order. Braces without a comma or without a match are left as-is."""
+    i = pattern.find('{', start)
+    while i >= 0:
+        depth = 0
+        commas = []
+        for j in range(i, len(pattern)):
+            c = pattern[j]
+            if c == '{':
+                depth += 1
+            elif c == '}':
+                depth -= 1
+                if not depth:
+                    break
+            elif c == ',' and depth == 1:
+                commas.append(j)
+        else:
+            commas = []
+        if commas:
+            prefix, suffix = pattern[:i], pattern[j+1:]
+            bounds = [i] + commas + [j]
+            return [
+                expanded
+                for a, b in zip(bounds, bounds[1:])
+                for expanded in _braces(prefix + pattern[a+1:b] + suffix, i)
+                ]
+        i = pattern.find('{', i + 1)
+    return [pattern]
+
+
+def _matcher(patterns):
+    if not patterns:
+        return None
+    return re.compile(
+        '|'.join(fnmatch.translate(pattern) for pattern in patterns)).match
+
+
+def _listdir(dirname):
+    """Returns ``(name, is_dir, is_link)`` for each entry of ``dirname``,
+    sorted by name, or nothing if it can't be listed."""
+    dirname = dirname or os.curdir
+    try:
+        if _scandir is None:
+            ret = []
+            for name in os.listdir(dirname):
+                path = os.path.join(dirname, name)
+                ret.append(
+                    (name, os.path.isdir(path), os.path.islink(path)))
+        else:
+            ret = [
+                (entry.name, entry.is_dir(), entry.is_symlink())
+                for entry in _scandir(dirname)]
+    except OSError:
+        return []
+    ret.sort()
+    return ret
+
+
+def _names(dirname):
+    """Returns the sorted names in ``dirname``, or nothing if it can't be
+    listed."""
+    try:
+        names = os.listdir(dirname or os.curdir)
+    except OSError:
+        return []
+    names.sort()
+    return names
+
+
+def _walk(dirname, exclude):
+    """Yields everything below ``dirname``, depth first, without following
+    symbolic links to directories."""
+    for name, is_dir, is_link in _listdir(dirname):
+        if name[0] == '.' or exclude is not None and exclude(name):
+            continue
+        path = os.path.join(dirname, name)
+        yield path
+        if is_dir and not is_link:
+            for subpath in _walk(path, exclude):
+                yield subpath
+
+
+def _select(dirname, parts, exclude):
+    """Yields the paths below ``dirname`` that match the pattern components
+    ``parts``, ``(part, match)`` pairs, in a stable order."""
+    part, match = parts[0]
+    rest = parts[1:]
+    if part == '**':
+        if not rest:
+            for path in _walk(dirname, exclude):
+                yield path
+            return
+        for path in _select(dirname, rest, exclude):
+            yield path
+        for name, is_dir, is_link in _listdir(dirname):
+            if (is_dir and not is_link and name[0] != '.'
+                    and (exclude is None or not exclude(name))):
+                for path in _select(
+                        os.path.join(dirname, name), parts, exclude):
+                    yield path
+    elif match is None:
+        path = os.path.join(dirname, part)
+        if rest:
+            for subpath in _select(path, rest, exclude):
+                yield subpath
+        elif os.path.lexists(path):
+            yield path
+    elif not rest:
+        prefix = os.path.join(dirname, '')
+        hidden = part[0] == '.'
+        for name in _names(dirname):
+            if match(name) and (hidden or name[0] != '.'):
+                yield prefix + name
+    else:
+        hidden = part[0] == '.'
+        for name, is_dir, is_link in _listdir(dirname):
+            if is_dir and match(name) and (hidden or name[0] != '.'):
+                for path in _select(
+                        os.path.join(dirname, name), rest, exclude):
+                    yield path
+
+
+def _split_pattern(pattern):
+    if os.altsep:
+        pattern = pattern.replace(os.altsep, os.sep)
+    drive, pattern = os.path.splitdrive(pattern)
+    root = drive
+    if pattern.startswith(os.sep):
+        root += os.sep
+    return root, [
+        (part, _matcher([part]) if _magic.search(part) else None)
+        for part in pattern.split(os.sep) if part]
+
+
+def _expand(pattern, include, exclude, seen):
+    """Lazily yields the paths matching ``pattern`` once its braces are
+    expanded, filtered by name with ``include`` and ``exclude``, and
+    skipping files in ``seen`` if it is a set."""
+    for expanded in _braces(pattern):
+        root, parts = _split_pattern(expanded)
+        if not parts:
+            if root and os.path.lexists(root):
+                yield root
+            continue
+        for path in _select(root, parts, exclude):
+            if include is not None or exclude is not None:
+                name = os.path.basename(path)
+                if exclude is not None and exclude(name):
+                    continue
+                if include is not None and not include(name):
+                    continue
+            if seen is not None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    pass
+                else:
+                    key = st.st_dev, st.st_ino
+                    if key in seen:
+                        continue
+                    seen.add(key)
+            yield path
+
+
+class _PathsMixin(object):
+    def __init__(self, include, exclude, dedupe, **kwargs):
+        super(_PathsMixin, self).__init__(**kwargs)
+        self.include = _matcher(include)
+        self.exclude = _matcher(exclude)
+        self.dedupe = dedupe
+
+    def coerce_value(self, arg, ba):
+        seen = None
+        if self.dedupe:
+            try:
+                seen = ba.meta[self.argument_name]
+            except KeyError:
+                seen = ba.meta[self.argument_name] = set()
+        return _expand(arg, self.include, self.exclude, seen)
+
+
+class ExpandedPathParameter(_PathsMixin, parser.PositionalParameter):
+    """Positional parameter that receives an iterator over the paths that
+    match the argument."""
+
+
+class ExpandedPathsParameter(_PathsMixin, parser.ExtraPosArgsParameter):
+    """Parameter that collects the remaining positional arguments, each
+    as an iterator over the paths that match it."""
+
+
+def paths(include=(), exclude=(), dedupe=False):
+    """For positional and ``*args``-like parameters, expands each argument
+    as a pattern into the paths that match it, without the shell.
+
+    The parameter receives, for each argument, an iterator which lists the
+    directories it needs as it is consumed and yields paths in a stable
+    order: ``{a,b}`` alternatives in order, then names in sorted order,
+    depth first. A pattern that matches nothing yields nothing.
+
+    The patterns support the wildcards of `fnmatch` in each path
+    component, ``{a,b}`` alternatives, and ``**`` which matches any number
+    of directories, like `glob.glob` with ``recursive=True``. Names that
+    start with ``.`` are only matched explicitly, and ``**`` does not
+    follow symbolic links to directories.
+
+    :param include: Only the paths whose name matches one of these
+        `fnmatch` patterns are yielded.
+    :param exclude: The paths whose name matches one of these `fnmatch`
+        patterns are skipped, and ``**`` doesn't descend into them.
+    :param bool dedupe: Skips the files that were already yielded for the
+        parameter, compared by device and inode. This makes one extra
+        system call per path.
+    """
+    return parser.use_class(
+        pos=ExpandedPathParameter, varargs=ExpandedPathsParameter, kwargs={
+            'include': include,
+            'exclude': exclude,
+            'dedupe': dedupe,
+            })
+
+
 def _convert_ioerror(arg, exc):
     nexc = errors.ArgumentError('{0.strerror}: {1!r}'.format(exc, arg))
     nexc.__cause__ = exc
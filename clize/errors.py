@@ -72,15 +72,52 @@ class DuplicateNamedArgument(ArgumentError):
             self.param.aliases[0])
 
 
+def did_you_mean(suggestions):
+    """Formats ``suggestions`` to be appended to an error message."""
+    if not suggestions:
+        return ''
+    names = [repr(name) for name in suggestions]
+    if len(names) > 1:
+        names[-2:] = ['{0} or {1}'.format(*names[-2:])]
+    return ', did you mean {0}?'.format(', '.join(names))
+
+
 class UnknownOption(ArgumentError):
-    """Raised when a named argument has no matching parameter."""
+    """Raised when a named argument has no matching parameter.
 
-    def __init__(self, name):
+    :param index: A `clize._suggest.Index` of the known options, used to
+        suggest the closest ones in the message.
+    """
+
+    def __init__(self, name, index=None):
         self.name = name
+        self.index = index
+
+    @property
+    def suggestions(self):
+        """The known options closest to the unknown one."""
+        if self.index is None:
+            return []
+        return self.index.closest(self.name)
 
     @property
     def message(self):
-        return "Unknown option {0!r}".format(self.name)
+        return "Unknown option {0!r}{1}".format(
+            self.name, did_you_mean(self.suggestions))
+
+
+class AmbiguousOption(ArgumentError):
+    """Raised when an abbreviated named argument matches several
+    parameters."""
+
+    def __init__(self, name, candidates):
+        self.name = name
+        self.candidates = candidates
+
+    @property
+    def message(self):
+        return "Ambiguous option {0!r}, could be {1}".format(
+            self.name, ', '.join(self.candidates))
 
 
 class MissingValue(ArgumentError):
@@ -111,6 +148,39 @@ class TooManyValues(ArgumentError):
                 self.param)
 
 
+class BadResponseFile(ArgumentError):
+    """Raised when a response file given with ``@path`` cannot be read."""
+
+    def __init__(self, path, error):
+        self.path = path
+        self.error = error
+
+    @property
+    def message(self):
+        return "Could not read response file {0}: {1}".format(
+            self.path, getattr(self.error, 'strerror', None) or self.error)
+
+
+class ItemError(UserError):
+    """Raised by `clize.parameters.parallel` when the function raised a
+    `UserError` for one of the items it was run for.
+
+    :param item: The item, or the tuple of items the function was given.
+    :param str text: The message of the original error.
+    """
+
+    def __init__(self, item, text):
+        self.item = item
+        self.text = text
+
+    def __str__(self):
+        if isinstance(self.item, tuple):
+            item = ' '.join(str(i) for i in self.item)
+        else:
+            item = self.item
+        return self.prefix_with_pname('{0}: {1}'.format(item, self.text))
+
+
 class CliValueError(ValueError):
     """Specialization of `ValueError` for showing a message to the user along
     with the error rather than just the incorrect value."""
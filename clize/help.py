@@ -5,6 +5,7 @@
 
 from __future__ import unicode_literals
 
+import sys
 import itertools
 import inspect
 import re
@@ -20,6 +21,8 @@ def lines_to_paragraphs(L):
 
 p_delim = re.compile(r'\n\s*\n')
 
+_help_cache = {}
+
 class Help(object):
     def __init__(self, subject, owner):
         self.subject = subject
@@ -34,6 +37,52 @@ class Help(object):
         if not self.prepared:
             self.prepare()
 
+    def cache_key(self):
+        """Returns a string that changes whenever the help shown by this
+        object would, or `None` if the help must not be cached."""
+        return None
+
+    def description_key(self):
+        """Like `cache_key`, but only for the description of the subject
+        shown in a list of commands."""
+        return None
+
+    def render(self, show, name):
+        self.prepare_once()
+        f = util.Formatter()
+        f.extend(show(name))
+        return six.text_type(f)
+
+    def show_cached(self, name):
+        """Returns the text of the help like ``show`` would. It is reused
+        from an earlier call in this process or, if a cache directory is
+        set for the subject, from an earlier run, as long as `cache_key`
+        and the terminal width are unchanged."""
+        key = self.cache_key()
+        if key is None:
+            return self.render(self.show, name)
+        key = repr((key, name, util.get_terminal_width()))
+        try:
+            return _help_cache[key]
+        except KeyError:
+            pass
+        cache_dir = util.get_cache_dir(
+            getattr(self.subject, 'cache_dir', None))
+        if not cache_dir:
+            text = _help_cache[key] = self.render(self.show, name)
+            return text
+        from clize import _cache
+        stored_key = repr((_cache.clize_stamp(), sys.version_info[:3]))
+        try:
+            text = _help_cache[key] = _cache.load(
+                cache_dir, 'help', key, stored_key)
+            return text
+        except KeyError:
+            pass
+        text = _help_cache[key] = self.render(self.show, name)
+        _cache.store(cache_dir, 'help', key, stored_key, text)
+        return text
+
     @runner.Clize(hide_help=True)
     @kwoargs('usage')
     @annotate(name=parameters.pass_name, args=parser.Parameter.UNDOCUMENTED)
@@ -42,14 +91,10 @@ class Help(object):
 
         usage: Only show the full usage
         """
-        self.prepare_once()
         name = name.rpartition(' ')[0]
-        f = util.Formatter()
         if usage:
-            f.extend(self.show_full_usage(name))
-        else:
-            f.extend(self.show(name))
-        return six.text_type(f)
+            return self.render(self.show_full_usage, name)
+        return self.show_cached(name)
 
 def split_docstring(s):
     if not s:
@@ -75,6 +120,27 @@ def pname(p):
     return getattr(p, 'argument_name', p.display_name)
 
 
+def param_key(param):
+    """Describes how ``param`` appears in the help, or returns `None` if it
+    takes part in preparing the help in an unknown way."""
+    ret = [type(param).__name__, param.display_name, param.undocumented]
+    if isinstance(param, runner._HelpParameter):
+        return repr(ret + [param.aliases])
+    ret.extend([str(param), param.get_all_names()])
+    if not param.undocumented:
+        ret.append(list(param.help_parens()))
+    if param.is_alternate_action:
+        ret.append(param.description)
+    if isinstance(param, parameters.DecoratedArgumentParameter):
+        sub = [param_key(p) for p in param.cli.parameters.values()]
+        if None in sub:
+            return None
+        ret.extend([inspect.getdoc(param.decorator), sub])
+    elif type(param).prepare_help != parser.Parameter.prepare_help:
+        return None
+    return repr(ret)
+
+
 def filter_undocumented(params):
     for param in params:
         if not param.undocumented:
@@ -170,6 +236,21 @@ class ClizeHelp(Help):
     def parse_func_help(self, obj):
         return self.parse_docstring(inspect.getdoc(obj))
 
+    def cache_key(self):
+        """Identifies the help by the docstrings of the subject and its
+        wrappers along with the layout of its parameters."""
+        func = self.subject.func
+        docs = [inspect.getdoc(func)]
+        docs.extend(inspect.getdoc(wrapper) for wrapper in wrappers(func))
+        params = [param_key(p) for p in self.signature.parameters.values()]
+        if None in params:
+            return None
+        return repr((type(self).__name__, docs, params))
+
+    def description_key(self):
+        """The description only depends on the subject's docstring."""
+        return repr((type(self).__name__, inspect.getdoc(self.subject.func)))
+
     def _parse_subject_help(self, subject):
         ret = self.parse_func_help(subject.func)
         for p in subject.signature.parameters.values():
@@ -253,6 +334,26 @@ class ClizeHelp(Help):
         return f
 
 class DispatcherHelper(Help):
+    def cache_key(self):
+        """Identifies the help by the dispatcher's description and footnotes
+        along with the description of each command."""
+        commands = []
+        for names, command in self.owner.cmds.items():
+            try:
+                key = command.helper.description_key()
+            except AttributeError:
+                return None
+            if key is None:
+                return None
+            commands.append((names, key))
+        return repr((
+            type(self).__name__, self.owner.description,
+            self.owner.footnotes, commands))
+
+    def description_key(self):
+        """Nested dispatchers have no description."""
+        return repr(type(self).__name__)
+
     def show_commands(self):
         f = util.Formatter()
         f.append('Commands:')
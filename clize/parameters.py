@@ -2,7 +2,9 @@
 # Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
 # See COPYING for details.
 
+import array as array_
 import inspect
+import itertools
 from functools import update_wrapper
 
 import six
@@ -165,23 +167,525 @@ class MultiOptionParameter(parser.MultiParameter, parser.OptionParameter):
         raise errors.NotEnoughValues
 
 
-def multi(min=0, max=None):
+class _LazyValues(object):
+    """Iterator over the values collected by a lazy `multi` parameter, which
+    converts each value as it is reached. Conversion errors are raised as
+    `.BadArgumentFormat` with the position of the faulty argument."""
+
+    def __init__(self, param, ba):
+        self.param = param
+        self.ba = ba
+        self.values = []
+        self.positions = []
+        self.index = 0
+
+    def append(self, pos, value):
+        self.positions.append(pos)
+        self.values.append(value)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        i = self.index
+        if i >= len(self.values):
+            raise StopIteration
+        self.index = i + 1
+        value = self.values[i]
+        self.values[i] = None
+        try:
+            return self.param.coerce_value(value, self.ba)
+        except errors.ArgumentError as exc:
+            parser._set_error_context(
+                exc, param=self.param, pos=self.positions[i], val=value,
+                ba=self.ba)
+            raise
+
+    next = __next__
+
+    def __length_hint__(self):
+        return len(self.values) - self.index
+
+
+class _LazyMultiParameter(parser.MultiParameter):
+    """Collects the values unconverted and without copying them."""
+
+    def get_values(self, ba):
+        """Return the `_LazyValues` new values are added to."""
+        raise NotImplementedError
+
+    def read_argument(self, ba, i):
+        values = self.get_values(ba)
+        values.append(i, self.get_value(ba, i))
+        count = len(values.values)
+        if self.min <= count:
+            ba.unsatisfied.discard(self)
+        if self.max is not None and self.max < count:
+            raise errors.TooManyValues
+
+
+class LazyMultiOptionParameter(_LazyMultiParameter, MultiOptionParameter):
+    """Named parameter that can collect multiple values, passed as an
+    iterator which converts them as they are consumed."""
+
+    def get_values(self, ba):
+        values = ba.kwargs.get(self.argument_name)
+        if values is None:
+            values = ba.kwargs[self.argument_name] = _LazyValues(self, ba)
+        return values
+
+    def post_parse(self, ba):
+        if self.argument_name not in ba.kwargs:
+            ba.kwargs[self.argument_name] = _LazyValues(self, ba)
+
+    def unsatisfied(self, ba):
+        if self.argument_name not in ba.kwargs:
+            return True
+        raise errors.NotEnoughValues
+
+
+class LazyPosArgsParameter(_LazyMultiParameter, parser.ExtraPosArgsParameter):
+    """Positional parameter that collects the remaining positional
+    arguments, passed as an iterator which converts them as they are
+    consumed."""
+
+    def get_values(self, ba):
+        values = ba.meta.get(self.argument_name)
+        if values is None:
+            values = ba.meta[self.argument_name] = _LazyValues(self, ba)
+            ba.args.append(values)
+        return values
+
+    def post_parse(self, ba):
+        if (self.default is util.UNSET
+                and self.argument_name not in ba.meta
+                and len(ba.args) == ba.sig.positional.index(self)):
+            ba.args.append(_LazyValues(self, ba))
+
+
+def _lazy_varargs(argument_name, **kwargs):
+    raise ValueError(
+        "Cannot pass an iterator through *{0}, use a positional parameter "
+        "instead".format(argument_name))
+
+
+def multi(min=0, max=None, lazy=False):
     """For option parameters, allows the parameter to be repeated on the
     command-line with an optional minimum or maximum. For ``*args``-like
     parameters, just adds the optional bounds.
 
+    :param bool lazy: Instead of a list, the parameter receives an iterator
+        which only converts each value when it is reached, and raises
+        `.BadArgumentFormat` then if it can't. The amount of values is
+        still checked beforehand. Positional parameters, but not
+        ``*args``-like ones, can then collect the remaining positional
+        arguments.
+
     .. literalinclude:: /../examples/multi.py
         :lines: 5-13
     """
-
+    kwargs = {
+        'min': min,
+        'max': max,
+        }
+    if lazy:
+        return parser.use_class(
+            pos=LazyPosArgsParameter, named=LazyMultiOptionParameter,
+            varargs=_lazy_varargs, kwargs=kwargs)
     return parser.use_class(
         named=MultiOptionParameter, varargs=parser.ExtraPosArgsParameter,
-        kwargs={
+        kwargs=kwargs)
+
+
+class _ArrayValues(object):
+    def __init__(self):
+        self.values = []
+        self.positions = []
+        self.count = 0
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+_numeric_typecodes = tuple('bBhHiIlLqQfd')
+
+
+class _ArrayMultiParameter(parser.MultiParameter):
+    """Collects the values unconverted, then converts all of them at once
+    into an `array.array` or `numpy.ndarray`."""
+
+    def __init__(self, typecode, dtype, separator, **kwargs):
+        super(_ArrayMultiParameter, self).__init__(**kwargs)
+        self.typecode = typecode
+        self.separator = separator
+        numpy = _numpy() if dtype is not None else None
+        if numpy is not None:
+            self.dtype = numpy.dtype(dtype)
+            integer = self.dtype.kind in 'iub'
+        else:
+            self.dtype = None
+            integer = typecode not in 'fd'
+        self.conv = int if integer else float
+
+    def get_values(self, ba):
+        """Return the `_ArrayValues` new values are added to."""
+        try:
+            return ba.meta[self.argument_name]
+        except KeyError:
+            values = ba.meta[self.argument_name] = _ArrayValues()
+            return values
+
+    def read_argument(self, ba, i):
+        values = self.get_values(ba)
+        value = self.get_value(ba, i)
+        values.values.append(value)
+        values.positions.append(i)
+        if self.separator and self.separator in value:
+            values.count += value.count(self.separator) + 1
+        else:
+            values.count += 1
+        if self.min <= values.count:
+            ba.unsatisfied.discard(self)
+        if self.max is not None and self.max < values.count:
+            raise errors.TooManyValues
+
+    def make_array(self, items):
+        """Converts a list of strings into an array of this parameter's
+        type."""
+        if self.dtype is not None:
+            return _numpy().array(items, dtype=self.dtype)
+        return array_.array(self.typecode, map(self.conv, items))
+
+    def _split(self, value):
+        if self.separator:
+            return value.split(self.separator)
+        return [value]
+
+    def convert(self, ba):
+        """Returns the array of all values, or raises `.BadArgumentFormat`
+        for the first one that can't be converted."""
+        values = ba.meta.get(self.argument_name)
+        if values is None:
+            return self.make_array([])
+        items = values.values
+        if self.separator:
+            items = self.separator.join(items).split(self.separator)
+        try:
+            return self.make_array(items)
+        except (ValueError, OverflowError, TypeError):
+            pass
+        for pos, value in zip(values.positions, values.values):
+            for item in self._split(value):
+                try:
+                    self.make_array([item])
+                except (ValueError, OverflowError, TypeError) as e:
+                    exc = errors.BadArgumentFormat(repr(item))
+                    exc.__cause__ = e
+                    parser._set_error_context(
+                        exc, param=self, pos=pos, val=value, ba=ba)
+                    raise exc
+        raise ValueError('Could not convert {0!r}'.format(items))
+
+
+class ArrayOptionParameter(_ArrayMultiParameter, MultiOptionParameter):
+    """Named parameter that can collect multiple numbers, passed as an
+    array."""
+
+    def post_parse(self, ba):
+        ba.kwargs[self.argument_name] = self.convert(ba)
+
+    def unsatisfied(self, ba):
+        if self.argument_name not in ba.meta:
+            return True
+        raise errors.NotEnoughValues
+
+
+class ArrayPosArgsParameter(_ArrayMultiParameter,
+                            parser.ExtraPosArgsParameter):
+    """Positional parameter that collects the remaining positional
+    arguments as numbers, passed as an array."""
+
+    def get_values(self, ba):
+        try:
+            return ba.meta[self.argument_name]
+        except KeyError:
+            values = ba.meta[self.argument_name] = _ArrayValues()
+            ba.args.append(None) # replaced after parsing
+            return values
+
+    def post_parse(self, ba):
+        index = ba.sig.positional.index(self)
+        if self.argument_name in ba.meta:
+            ba.args[index] = self.convert(ba)
+        elif self.default is util.UNSET and len(ba.args) == index:
+            ba.args.append(self.make_array([]))
+
+
+def _array_varargs(argument_name, **kwargs):
+    raise ValueError(
+        "Cannot pass an array through *{0}, use a positional parameter "
+        "instead".format(argument_name))
+
+
+def array(typecode, dtype=None, min=0, max=None, separator=','):
+    """For option parameters, allows the parameter to be repeated on the
+    command-line, and for positional parameters, collects the remaining
+    positional arguments. Either way, the values are numbers, which the
+    function receives in a compact array rather than a list.
+
+    The values are all converted at once after the arguments are read,
+    and the first one that can't be converted is reported with
+    `.BadArgumentFormat`.
+
+    :param str typecode: The type of the numbers, as an `array.array`
+        type code, eg. ``'d'`` for floats or ``'q'`` for 64-bit integers.
+    :param dtype: If set and NumPy can be imported, the values are put in a
+        `numpy.ndarray` of this data type instead.
+    :param int min: The minimum amount of values.
+    :param int max: The maximum amount of values.
+    :param str separator: Each argument may contain several values
+        separated by this, eg. ``1,2,3``. If `None`, each argument is one
+        value.
+    """
+    if typecode not in _numeric_typecodes:
+        raise ValueError(
+            'Expected a numeric array type code, got {0!r}'.format(typecode))
+    array_.array(typecode) # raises ValueError for unsupported type codes
+    return parser.use_class(
+        pos=ArrayPosArgsParameter, named=ArrayOptionParameter,
+        varargs=_array_varargs, kwargs={
+            'typecode': typecode,
+            'dtype': dtype,
+            'separator': separator,
             'min': min,
             'max': max,
         })
 
 
+class StreamParameter(parser.ExtraPosArgsParameter):
+    """Positional parameter that receives the remaining arguments as an
+    iterator."""
+
+    def __init__(self, required=False, default=util.UNSET, **kwargs):
+        super(StreamParameter, self).__init__(
+            required=required or default is util.UNSET, default=default,
+            **kwargs)
+
+    def read_argument(self, ba, i):
+        """Passes an iterator over this and all remaining arguments, then
+        stops processing arguments."""
+        try:
+            args = ba.in_args.drain(i)
+        except AttributeError:
+            args = itertools.islice(ba.in_args, i, None)
+        if self.conv is not parser.identity:
+            args = self._coerce_values(ba, i, args)
+        ba.args.append(args)
+        ba.unsatisfied.discard(self)
+        ba.stop = True
+
+    def _coerce_values(self, ba, i, args):
+        for pos, arg in enumerate(args, i):
+            try:
+                yield self.coerce_value(arg, ba)
+            except errors.ArgumentError as exc:
+                parser._set_error_context(
+                    exc, param=self, pos=pos, val=arg, ba=ba)
+                raise
+
+    def unsatisfied(self, ba):
+        return True
+
+
+stream = parser.use_class(pos=StreamParameter)
+"""Makes a positional parameter receive an iterator over all remaining
+arguments instead of a single one. The arguments are converted as they are
+consumed, and are not scanned for options, so these must come first.
+
+Combined with the ``response_files`` option of `.Clize`, this lets the
+function process arguments as they are read from a response file.
+
+.. literalinclude:: /../examples/stream.py
+    :lines: 5-24
+"""
+
+
+def _executor_class(name):
+    from concurrent import futures
+    return {
+        'process': futures.ProcessPoolExecutor,
+        'thread': futures.ThreadPoolExecutor,
+        }[name]
+
+
+def _call(func, args, kwargs):
+    # UserErrors are sent back as text because the exception types of
+    # clize can't always be pickled
+    try:
+        return True, func(*args, **kwargs)
+    except errors.UserError as exc:
+        try:
+            text = exc.message
+        except AttributeError:
+            text = ValueError.__str__(exc)
+        return False, text
+
+
+class _FanOut(object):
+    """Runs the function once per chunk of the values of a
+    `ParallelParameter` and merges the return values.
+
+    Set as `.CliBoundArguments.func`, it is given the target function as
+    first argument."""
+
+    _clize__wraps_target = True
+
+    def __init__(self, executor, jobs, ordered, chunksize, start):
+        self.executor = executor
+        self.jobs = jobs
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.start = start
+
+    def __call__(self, _func, *args, **kwargs):
+        prefix = args[:self.start]
+        items = args[self.start:]
+        if not items:
+            # like with a plain *args parameter, the function is called
+            # once, without values
+            return _func(*prefix, **kwargs)
+        size = self.chunksize
+        chunks = [items[i:i+size] for i in range(0, len(items), size)]
+        if self.jobs == 1 or len(chunks) < 2:
+            # lazily, so that the chunks after a failed one aren't run
+            results = (
+                (chunk, _call(_func, prefix + chunk, kwargs))
+                for chunk in chunks)
+        else:
+            results = self._run_pool(_func, prefix, chunks, kwargs)
+        ret = []
+        for chunk, (ok, value) in results:
+            if not ok:
+                raise errors.ItemError(
+                    chunk[0] if len(chunk) == 1 else chunk, value)
+            if value is not None:
+                ret.append(value)
+        if ret:
+            return '\n'.join(six.text_type(value) for value in ret)
+
+    def _run_pool(self, func, prefix, chunks, kwargs):
+        from concurrent import futures
+        pool = _executor_class(self.executor)(max_workers=self.jobs)
+        submitted = []
+        try:
+            for chunk in chunks:
+                submitted.append(
+                    (pool.submit(_call, func, prefix + chunk, kwargs), chunk))
+            if self.ordered:
+                done = submitted
+            else:
+                chunk_of = dict(submitted)
+                done = (
+                    (future, chunk_of[future])
+                    for future in futures.as_completed(chunk_of))
+            results = []
+            for future, chunk in done:
+                result = future.result()
+                results.append((chunk, result))
+                if not result[0]:
+                    break
+            return results
+        finally:
+            for future, _ in submitted:
+                future.cancel()
+            pool.shutdown()
+
+
+@parser.value_converter(name='INT')
+def _job_count(arg):
+    ret = int(arg)
+    if ret < 1:
+        raise errors.CliValueError('Expected at least 1 job')
+    return ret
+
+
+class _JobsParameter(parser.IntOptionParameter):
+    description = 'Amount of workers to run the command with.'
+
+
+class ParallelParameter(parser.ExtraPosArgsParameter):
+    """``*args``-like parameter whose values are each given to a separate
+    call of the function, run across a pool of workers.
+
+    Incurs a ``--jobs``/``-j`` option to set the amount of workers."""
+
+    def __init__(self, jobs, executor, ordered, chunksize, **kwargs):
+        super(ParallelParameter, self).__init__(**kwargs)
+        self.jobs = jobs
+        self.executor = executor
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.jobs_param = _JobsParameter(
+            argument_name=self.argument_name + '.jobs',
+            aliases=['--jobs', '-j'], conv=_job_count, default=jobs)
+        self.extras = (self.jobs_param,)
+
+    def post_parse(self, ba):
+        """Replaces the function with one that fans the values out."""
+        super(ParallelParameter, self).post_parse(ba)
+        jobs = ba.kwargs.pop(self.jobs_param.argument_name, self.jobs)
+        ba.func = _FanOut(
+            self.executor, jobs, self.ordered, self.chunksize,
+            ba.sig.positional.index(self))
+
+
+@modifiers.autokwoargs
+def parallel(jobs=None, executor='process', ordered=True, chunksize=1):
+    """For ``*args``-like parameters, runs the function once for each value
+    rather than once with all of them, across a pool of workers from
+    `concurrent.futures`. The other arguments are passed to every call.
+
+    The return values that aren't `None` are joined with newlines.
+    A `.UserError` raised for a value is reported with that value, and the
+    values that weren't processed yet are abandoned. If no values are
+    given, the function is called once in the current process without any,
+    as it would be without `parallel`.
+
+    The CLI gets a ``--jobs``/``-j`` option to set the amount of workers.
+
+    :param int jobs: The default amount of workers. If `None`, the default
+        of the executor, which depends on the amount of CPUs. With one
+        worker, the function runs in the current process.
+    :param str executor: ``'process'`` to run the function in other
+        processes, in which case it must be picklable, ie. importable by
+        name, and the `.run` call must be guarded with ``if __name__ ==
+        '__main__':``, or ``'thread'`` to run it in threads.
+    :param bool ordered: If false, the return values are merged as they
+        become available rather than in the order of the values.
+    :param int chunksize: How many values to pass to each call.
+
+    .. literalinclude:: /../examples/parallel.py
+        :lines: 5-24
+    """
+    if executor not in ('process', 'thread'):
+        raise ValueError(
+            "Unknown executor {0!r}, expected 'process' or 'thread'"
+            .format(executor))
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    return parser.use_class(varargs=ParallelParameter, kwargs={
+        'jobs': jobs,
+        'executor': executor,
+        'ordered': ordered,
+        'chunksize': chunksize,
+        })
+
+
 class _ComposedProperty(object):
     def __init__(self, name):
         self.name = name
@@ -211,6 +715,7 @@ class _SubBoundArguments(object):
     sticky = _ComposedProperty('sticky')
     posarg_only = _ComposedProperty('posarg_only')
     skip = _ComposedProperty('skip')
+    stop = _ComposedProperty('stop')
     unsatisfied = _ComposedProperty('unsatisfied')
 
 
@@ -232,6 +737,7 @@ class _DerivBoundArguments(object):
     sticky = _ComposedProperty('sticky')
     posarg_only = _ComposedProperty('posarg_only')
     skip = _ComposedProperty('skip')
+    stop = _ComposedProperty('stop')
 
 
 class ForwarderParameter(parser.NamedParameter,
@@ -6,13 +6,18 @@
 interpret function signatures and read commandline arguments
 """
 
+import sys
+import time
+import bisect
 import itertools
+import threading
+import collections
 from functools import partial, wraps
 
 import six
 from sigtools import modifiers
 
-from clize import errors, util
+from clize import errors, util, _suggest
 
 
 class ParameterFlag(object):
@@ -172,16 +177,87 @@ class HelperParameter(Parameter):
             display_name='<internal>', **kwargs)
 
 
+CacheInfo = collections.namedtuple(
+    'CacheInfo', 'hits misses maxsize currsize')
+"""Statistics of a value converter's cache, as returned by its
+``cache_info`` method."""
+
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def _cached_converter(func, maxsize, ttl):
+    cache = util.OrderedDict()
+    stats = [0, 0]
+    lock = threading.Lock()
+
+    @wraps(func)
+    def _cached(arg):
+        with lock:
+            try:
+                value, expires = cache.pop(arg)
+            except KeyError:
+                pass
+            else:
+                if expires is None or _clock() < expires:
+                    # reinserting marks it as the most recently used
+                    cache[arg] = value, expires
+                    stats[0] += 1
+                    return value
+            stats[1] += 1
+        # errors are raised again for each occurrence, not cached
+        value = func(arg)
+        with lock:
+            cache[arg] = value, None if ttl is None else _clock() + ttl
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+        return value
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats[0], stats[1], maxsize, len(cache))
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats[:] = [0, 0]
+
+    _cached.cache_info = cache_info
+    _cached.cache_clear = cache_clear
+    return _cached
+
+
 @modifiers.kwoargs(start='name')
-def value_converter(func=None, name=None):
+def value_converter(func=None, name=None, cache=None, ttl=None):
     """Callables decorated with this can be used as a value converter.
 
+    :param str name: The name of the value type shown in the help.
+    :param cache: If set, remembers the values returned for each argument
+        so that the callable only runs once for repeated arguments. It
+        can be the maximum amount of values to remember, the least
+        recently used ones being forgotten first, or ``'process'`` to
+        remember all of them for as long as the process runs. The
+        decorated callable is then wrapped, and the wrapper has a
+        ``cache_info()`` method returning a `CacheInfo` and a
+        ``cache_clear()`` method. Errors are not remembered.
+    :param float ttl: With ``cache``, the amount of seconds after which
+        a value is converted again.
+
     See :ref:`value converter`.
     """
+    if cache == 'process':
+        maxsize = None
+    elif cache is not None:
+        maxsize = int(cache)
+        if maxsize < 1:
+            raise ValueError(
+                "cache must be 'process' or a positive amount of values")
     def decorate(func):
         info = {
             'name': util.name_type2cli(func) if name is None else name,
         }
+        if cache is not None:
+            func = _cached_converter(func, maxsize, ttl)
         try:
             func._clize__value_converter = info
             return func
@@ -278,6 +354,45 @@ class ParameterWithValue(Parameter):
             yield 'default: ' + str(self.default)
 
 
+class _ArgumentsOverlay(object):
+    """Read-only sequence that shows ``base`` with the argument at
+    ``index`` replaced by ``value``, without copying ``base``."""
+
+    __slots__ = ('base', 'index', 'value')
+
+    def __init__(self, base, index, value):
+        if isinstance(base, _ArgumentsOverlay) and base.index == index:
+            base = base.base
+        self.base = base
+        self.index = index
+        self.value = value
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return tuple(self[i] for i in range(*key.indices(len(self))))
+        if key < 0:
+            key += len(self.base)
+        if key == self.index:
+            return self.value
+        return self.base[key]
+
+    def __iter__(self):
+        for i, arg in enumerate(self.base):
+            yield self.value if i == self.index else arg
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
 class NamedParameter(Parameter):
     """Equivalent of a keyword-only parameter in Python.
 
@@ -322,12 +437,11 @@ class NamedParameter(Parameter):
         it will call this to proceed as if ``-a -bcd`` was passed."""
         if not rest:
             return
-        try:
-            nparam = ba.sig.aliases['-' + rest[0]]
-        except KeyError as e:
-            raise errors.UnknownOption(e.args[0])
+        nparam = ba.sig.short_option(rest[0])
+        if nparam is None:
+            raise errors.UnknownOption('-' + rest[0], ba.sig._option_index)
         orig_args = ba.in_args
-        ba.in_args = ba.in_args[:i] + ('-' + rest,) + ba.in_args[i + 1:]
+        ba.in_args = _ArgumentsOverlay(orig_args, i, '-' + rest)
         try:
             nparam.read_argument(ba, i)
         finally:
@@ -814,11 +928,28 @@ class CliSignature(object):
         :annotation: = set()
 
         A set of all required parameters.
+
+    .. attribute:: short_options
+
+        Table of the named parameters triggered by one dash and a character,
+        indexed by the character's code point for the first 256 code points.
+
+    .. attribute:: long_options
+        :annotation: = {}
+
+        Maps the aliases starting with two dashes to `NamedParameter`
+        instances.
+
+    .. attribute:: abbreviations
+        :annotation: = False
+
+        Whether long options can be abbreviated to any prefix that matches
+        only one parameter, like ``--verb`` for ``--verbose``.
     """
 
     converter = default_converter
 
-    def __init__(self, parameters):
+    def __init__(self, parameters, abbreviations=False):
         params = self.parameters = util.OrderedDict()
         pos = self.positional = []
         named = self.named = []
@@ -851,6 +982,59 @@ class CliSignature(object):
                 pos.append(param)
             params[getattr(param, 'argument_name', param.display_name)] = param
 
+        self._post_parse = [
+            param for param in params.values()
+            if _is_overridden(param.post_parse, Parameter.post_parse)]
+        # looked up for each argument after an error
+        self._alternate_aliases = frozenset(
+            alias for alias, param in aliases.items()
+            if param.is_alternate_action)
+
+        short = self.short_options = [None] * 256
+        long_ = self.long_options = {}
+        for alias, param in aliases.items():
+            if alias.startswith('--'):
+                long_[alias] = param
+            elif len(alias) == 2 and alias[0] == '-' and ord(alias[1]) < 256:
+                short[ord(alias[1])] = param
+
+        # only built if an unknown option needs suggestions
+        self._option_index = _suggest.Index(aliases)
+
+        self.abbreviations = abbreviations
+        if abbreviations:
+            # prefixes are looked up by bisection
+            self._sorted_long_options = sorted(long_)
+
+    def short_option(self, char):
+        """Returns the parameter triggered by ``'-' + char``, or `None`."""
+        code = ord(char)
+        if code < 256:
+            return self.short_options[code]
+        return self.aliases.get('-' + char)
+
+    def long_option(self, name):
+        """Returns the parameter triggered by the long option ``name``, or
+        `None`. With `.abbreviations`, ``name`` may also be the prefix of the
+        aliases of a single parameter.
+
+        :raises: `.errors.AmbiguousOption` if ``name`` is the prefix of
+            aliases of several parameters.
+        """
+        param = self.long_options.get(name)
+        if param is not None or not self.abbreviations:
+            return param
+        names = self._sorted_long_options
+        matches = []
+        for i in range(bisect.bisect_left(names, name), len(names)):
+            if not names[i].startswith(name):
+                break
+            matches.append(names[i])
+        params = set(self.long_options[alias] for alias in matches)
+        if len(params) > 1:
+            raise errors.AmbiguousOption(name, matches)
+        return params.pop() if params else None
+
     @classmethod
     def from_signature(cls, sig, extra=(), **kwargs):
         """Takes a signature object and returns an instance of this class
@@ -860,11 +1044,24 @@ class CliSignature(object):
         :param iterable extra: Extra parameter instances to include.
         """
         return cls(
-            parameters=itertools.chain(
-                filter(lambda x: x is not Parameter.IGNORE,
-                    (cls.convert_parameter(param)
-                    for param in sig.parameters.values())
-                ), extra), **kwargs)
+            parameters=itertools.chain(cls.convert_parameters(sig), extra),
+            **kwargs)
+
+    @classmethod
+    def convert_parameters(cls, sig):
+        """Converts each parameter of a signature object, leaving out the
+        ignored ones.
+
+        :param inspect.Signature sig: The signature object to use.
+        :rtype: list
+        """
+        return [
+            cparam
+            for cparam in (
+                cls.convert_parameter(param)
+                for param in sig.parameters.values())
+            if cparam is not Parameter.IGNORE
+            ]
 
     @classmethod
     def convert_parameter(cls, param):
@@ -889,14 +1086,42 @@ class CliSignature(object):
 
 
 
-    def read_arguments(self, args, name):
+    def read_arguments(self, args, name, response_files=None):
         """Returns a `.CliBoundArguments` instance for this CLI signature
         bound to the given arguments.
 
         :param sequence args: The CLI arguments, minus the script name.
         :param str name: The script name.
+        :param str response_files: If set, arguments of the form ``@path``
+            are replaced with the arguments read from the file at ``path``.
+            See `.CliBoundArguments`.
         """
-        return CliBoundArguments(self, args, name)
+        return CliBoundArguments(self, args, name, response_files)
+
+    def read_arguments_many(self, argvs, name, catch_errors=False,
+                            response_files=None):
+        """Binds each sequence of arguments from ``argvs`` like
+        `read_arguments` does, and yields the resulting `.CliBoundArguments`
+        instances as ``argvs`` is iterated.
+
+        :param iterable argvs: Sequences of CLI arguments, minus the
+            script name.
+        :param str name: The script name.
+        :param bool catch_errors: If true, the `.ArgumentError` raised by
+            an argument sequence is yielded in place of its bound arguments
+            rather than raised, so that the remaining ones are still read.
+        :param str response_files: See `read_arguments`.
+        """
+        bind = CliBoundArguments
+        for args in argvs:
+            try:
+                ba = bind(self, args, name, response_files)
+            except errors.ArgumentError as exc:
+                if not catch_errors:
+                    raise
+                yield exc
+            else:
+                yield ba
 
     def __str__(self):
         return ' '.join(
@@ -906,30 +1131,54 @@ class CliSignature(object):
             )
 
 
-class _SeekFallbackCommand(object):
-    """Context manager that tries to seek a fallback command if an error was
-    raised."""
-    def __enter__(self):
-        pass
+def _is_overridden(method, base):
+    # avoids vars(), which would make attribute lookups on the instance slower
+    return (getattr(method, '__func__', method)
+            is not six.get_unbound_function(base))
 
-    def __exit__(self, typ, exc, tb):
-        if exc is None:
-            return
+
+def _seek_fallback_command(ba, pos):
+    """Tries to find an alternate action (such as ``--help``) after the
+    argument at ``pos``, which caused an error. Returns `True` if one
+    accepted to process the remaining arguments."""
+    alternate_aliases = ba.sig._alternate_aliases
+    if not alternate_aliases:
+        return False
+    i = pos
+    while True:
+        i += 1
         try:
-            pos = exc.pos
-            ba = exc.ba
-        except AttributeError:
-            return
+            arg = ba.in_args[i]
+        except IndexError:
+            return False
+        except errors.BadResponseFile:
+            # unreadable response files are skipped, the caller reports the
+            # original error if no alternate action is found
+            i -= 1
+            continue
+        if arg in alternate_aliases:
+            param = ba.sig.aliases[arg]
+        elif ba.sig.abbreviations and arg.startswith('--'):
+            try:
+                param = ba.sig.long_option(arg.partition('=')[0])
+            except errors.AmbiguousOption:
+                continue
+            if param is None or not param.is_alternate_action:
+                continue
+        else:
+            continue
+        try:
+            param.read_argument(ba, i)
+        except errors.ArgumentError:
+            continue
+        ba.unsatisfied.clear()
+        return True
 
-        for i, arg in enumerate(ba.in_args[pos + 1:], pos +1):
-            param = ba.sig.aliases.get(arg, None)
-            if param in ba.sig.alternate:
-                try:
-                    param.read_argument(ba, i)
-                except errors.ArgumentError:
-                    continue
-                ba.unsatisfied.clear()
-                return True
+
+def _set_error_context(exc, **attributes):
+    for key, val in attributes.items():
+        if not hasattr(exc, key):
+            setattr(exc, key, val)
 
 
 class CliBoundArguments(object):
@@ -938,6 +1187,13 @@ class CliBoundArguments(object):
     :param CliSignature sig: The signature to bind against.
     :param sequence args: The CLI arguments, minus the script name.
     :param str name: The script name.
+    :param str response_files: If set, each argument of the form ``@path``
+        is replaced with the arguments read from the file at ``path``, which
+        can be ``'lines'`` for one argument per line, ``'nul'`` for arguments
+        separated by NUL characters like ``find -print0`` produces, or
+        ``'shell'`` to split them like a POSIX shell would. The files are
+        read as the arguments are processed, and large files are
+        memory-mapped.
 
     .. attribute:: sig
 
@@ -945,7 +1201,8 @@ class CliBoundArguments(object):
 
     .. attribute:: in_args
 
-        The CLI arguments, minus the script name.
+        The CLI arguments, minus the script name. This is a sequence which
+        may read response files as it is indexed or iterated.
 
     .. attribute:: name
 
@@ -970,7 +1227,9 @@ class CliBoundArguments(object):
     .. attribute:: func
         :annotation: = None
 
-        If not `None`, replaces the target function.
+        If not `None`, replaces the target function. If it has a true
+        ``_clize__wraps_target`` attribute, it is called with the target
+        function followed by the arguments instead.
 
     .. attribute:: post_name
         :annotation: = []
@@ -1003,6 +1262,12 @@ class CliBoundArguments(object):
 
        Amount of arguments to skip.
 
+    .. attribute:: stop
+       :annotation: = False
+
+       Stops processing arguments when set to `True`, leaving the remaining
+       ones to the parameter that set it.
+
     .. attribute:: unsatisfied
        :annotation: = set(<required parameters>)
 
@@ -1011,54 +1276,120 @@ class CliBoundArguments(object):
     """
 
 
-    def __init__(self, sig, args, name):
+    __slots__ = (
+        'sig', 'name', 'in_args', 'func', 'post_name', 'args', 'kwargs',
+        'meta',
+        # only set while processing arguments
+        'posparam', 'sticky', 'posarg_only', 'skip', 'stop', 'unsatisfied',
+        )
+
+    def __init__(self, sig, args, name, response_files=None):
         self.sig = sig
-        self.name = name
-        self.in_args = tuple(args)
-        self.func = None
         self.post_name = []
         self.args = []
         self.kwargs = {}
         self.meta = {}
+        self.reset(args, name, response_files)
+
+    def reset(self, args, name, response_files=None):
+        """Binds this instance to new arguments, as if it was created anew
+        with the same signature.
+
+        The `.args`, `.kwargs`, `.meta` and `.post_name` containers are
+        emptied and reused rather than replaced, so values obtained from
+        them for the previous arguments must be copied first.
+
+        :param sequence args: The CLI arguments, minus the script name.
+        :param str name: The script name.
+        :param str response_files: See above.
+        """
+        self.name = name
+        if response_files:
+            from clize import _argfiles
+            self.in_args = _argfiles.ResponseFileArguments(
+                tuple(args), response_files)
+        else:
+            self.in_args = tuple(args)
+        self.func = None
+        del self.post_name[:]
+        del self.args[:]
+        self.kwargs.clear()
+        self.meta.clear()
 
         self.posparam = iter(self.sig.positional)
         self.sticky = None
         self.posarg_only = False
         self.skip = 0
+        self.stop = False
         self.unsatisfied = set(self.sig.required)
-
-        with _SeekFallbackCommand():
+        try:
+            self._read_arguments()
+        finally:
+            # emptying slots doesn't allocate, unlike removing dict entries
+            del self.posparam, self.sticky, self.posarg_only, self.skip
+            del self.stop, self.unsatisfied
+
+    def _read_arguments(self):
+        short_options = self.sig.short_options
+        long_options = self.sig.long_options
+        i = arg = param = None
+        try:
             for i, arg in enumerate(self.in_args):
                 if self.skip > 0:
                     self.skip -= 1
                     continue
-                with errors.SetArgumentErrorContext(pos=i, val=arg, ba=self):
-                    if self.posarg_only or len(arg) < 2 or arg[0] != '-':
-                        if self.sticky is not None:
-                            param = self.sticky
-                        else:
-                            try:
-                                param = next(self.posparam)
-                            except StopIteration:
-                                exc = errors.TooManyArguments(
-                                    self.in_args[i:])
-                                exc.__cause__ = None
-                                raise exc
-                    elif arg == '--':
+                if self.posarg_only or len(arg) < 2 or arg[0] != '-':
+                    if self.sticky is not None:
+                        param = self.sticky
+                    else:
+                        try:
+                            param = next(self.posparam)
+                        except StopIteration:
+                            exc = errors.TooManyArguments(self.in_args[i:])
+                            exc.__cause__ = None
+                            raise exc
+                elif arg[1] == '-':
+                    if len(arg) == 2:
                         self.posarg_only = True
                         continue
+                    name = arg.partition('=')[0] if '=' in arg else arg
+                    param = long_options.get(name)
+                    if param is None:
+                        param = self.sig.long_option(name)
+                        if param is None:
+                            raise errors.UnknownOption(
+                                name, self.sig._option_index)
+                else:
+                    code = ord(arg[1])
+                    if code < 256:
+                        param = short_options[code]
                     else:
-                        if arg.startswith('--'):
-                            name = arg.partition('=')[0]
-                        else:
-                            name = arg[:2]
-                        try:
-                            param = self.sig.aliases[name]
-                        except KeyError:
-                            raise errors.UnknownOption(name)
-                    with errors.SetArgumentErrorContext(param=param):
-                        param.read_argument(self, i)
-                        param.apply_generic_flags(self)
+                        param = self.sig.aliases.get(arg[:2])
+                    if param is None:
+                        raise errors.UnknownOption(
+                            arg[:2], self.sig._option_index)
+                param.read_argument(self, i)
+                param.apply_generic_flags(self)
+                if self.stop:
+                    break
+                # fetching the next argument can fail too, eg. with
+                # BadResponseFile, which isn't this parameter's fault
+                param = None
+        except errors.ArgumentError as exc:
+            # the error context is only filled in once something fails,
+            # rather than entering context managers for every argument
+            exc_info = sys.exc_info()
+            if param is not None:
+                _set_error_context(exc, param=param)
+            if i is not None:
+                _set_error_context(exc, pos=i, val=arg)
+            _set_error_context(exc, ba=self)
+            try:
+                ba, pos = exc.ba, exc.pos
+            except AttributeError:
+                six.reraise(*exc_info)
+            if not _seek_fallback_command(ba, pos):
+                six.reraise(*exc_info)
 
         if not self.func:
             if self.unsatisfied:
@@ -1070,11 +1401,9 @@ class CliBoundArguments(object):
                 if unsatisfied:
                     raise errors.MissingRequiredArguments(unsatisfied)
 
-            for p in self.sig.parameters.values():
+            for p in self.sig._post_parse:
                 p.post_parse(self)
 
-        del self.sticky, self.posarg_only, self.skip, self.unsatisfied
-
     def __iter__(self):
         yield self.func
         yield self.post_name
@@ -6,14 +6,17 @@ from __future__ import print_function
 
 import sys
 import os
+import inspect
+import importlib
 from functools import partial, update_wrapper
 import itertools
 import shutil
 
+import six
 from sigtools.modifiers import annotate, autokwoargs, kwoargs
 from sigtools.specifiers import forwards_to_method, signature
 
-from clize import util, errors, parser, parameters
+from clize import util, errors, parser, parameters, _suggest
 
 
 class _BasicHelper(object):
@@ -32,11 +35,22 @@ class _CliWrapper(object):
             obj.helper = _BasicHelper(description, usages)
         self.cli = obj
 
+def _lazy_commands(obj, clizer):
+    def lazy(val):
+        if isinstance(val, six.string_types):
+            return LazyCommand(val, clizer=clizer)
+        return val
+    try:
+        items = obj.items()
+    except AttributeError:
+        return [lazy(val) for val in util.maybe_iter(obj)]
+    return util.OrderedDict((key, lazy(val)) for key, val in items)
+
 def cli_commands(obj, namef, clizer):
     cmds = util.OrderedDict()
     cmd_by_name = {}
     try:
-        names = util.dict_from_names(obj).items()
+        names = util.dict_from_names(_lazy_commands(obj, clizer)).items()
     except AttributeError:
         raise ValueError("Cannot guess name for anonymous objects "
                          "(lists, dicts, etc)")
@@ -50,6 +64,65 @@ def cli_commands(obj, namef, clizer):
             cmd_by_name[name] = cli
     return cmds, cmd_by_name
 
+_iscoroutine = getattr(inspect, 'iscoroutine', lambda obj: False)
+_isasyncgen = getattr(inspect, 'isasyncgen', lambda obj: False)
+
+
+def _new_event_loop(loop_factory):
+    import asyncio
+    loop = asyncio.new_event_loop() if loop_factory is None else loop_factory()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+def _close_event_loop(loop):
+    import asyncio
+    try:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _run_coroutine(coro, loop_factory):
+    loop = _new_event_loop(loop_factory)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        _close_event_loop(loop)
+
+
+class StreamedOutput(object):
+    """Iterator over the values produced by an asynchronous generator
+    returned by a command, which `.run` prints as they come.
+
+    The generator is driven on one event loop, created when iteration
+    starts and closed once it stops."""
+
+    def __init__(self, agen, loop_factory, cli, pname):
+        self.agen = agen
+        self.loop_factory = loop_factory
+        self.cli = cli
+        self.pname = pname
+
+    def __iter__(self):
+        loop = _new_event_loop(self.loop_factory)
+        try:
+            with errors.SetUserErrorContext(cli=self.cli, pname=self.pname):
+                while True:
+                    try:
+                        value = loop.run_until_complete(
+                            self.agen.__anext__())
+                    except StopAsyncIteration:
+                        return
+                    yield value
+        finally:
+            try:
+                loop.run_until_complete(self.agen.aclose())
+            finally:
+                _close_event_loop(loop)
+
+
 class Clize(object):
     """Wraps a function into a CLI object that accepts command-line arguments
     and translates them to match the wrapped function's parameters."""
@@ -62,7 +135,9 @@ class Clize(object):
             return super(Clize, cls).__new__(cls)
 
     def __init__(self, fn, owner=None, alt=(), extra=(),
-                 help_names=('help', 'h'), helper_class=None, hide_help=False):
+                 help_names=('help', 'h'), helper_class=None, hide_help=False,
+                 cache_dir=None, response_files=None, abbreviations=False,
+                 loop_factory=None):
         """
         :param sequence alt: Alternate actions the CLI will handle.
         :param help_names: Names to use to trigger the help.
@@ -72,6 +147,24 @@ class Clize(object):
         :type helper_class: a type like `.ClizeHelp`
         :param bool hide_help: Mark the parameters used to trigger the help
             as undocumented.
+        :param str cache_dir: A directory in which to keep the parameters
+            deduced from ``fn`` and its rendered help between runs. If
+            unset, uses the ``CLIZE_CACHE_DIR`` environment variable.
+            Caching is disabled if neither is set.
+        :param str response_files: If set, arguments of the form ``@path``
+            are replaced with the arguments listed in the file at ``path``,
+            one per line with ``'lines'``, separated by NUL characters with
+            ``'nul'``, or split like a shell would with ``'shell'``.
+            Use it to pass more arguments than the system allows on a
+            command line.
+        :param bool abbreviations: Accept any prefix of a long option's
+            name that matches only one parameter, like ``--verb`` for
+            ``--verbose``.
+        :param loop_factory: Called without arguments to create the event
+            loop on which coroutine functions and asynchronous generator
+            functions are run, for instance ``uvloop.new_event_loop``.
+            If unset, uses the current event loop policy. No event loop is
+            created for other functions.
         """
         update_wrapper(self, fn)
         self.func = fn
@@ -82,6 +175,10 @@ class Clize(object):
         self.help_aliases = [util.name_py2cli(s, kw=True) for s in help_names]
         self.helper_class = helper_class
         self.hide_help = hide_help
+        self.cache_dir = cache_dir
+        self.response_files = response_files
+        self.abbreviations = abbreviations
+        self.loop_factory = loop_factory
 
     def parameters(self):
         """Returns the parameters used to instantiate this class, minus the
@@ -92,6 +189,10 @@ class Clize(object):
             'help_names': self.help_names,
             'helper_class': self.helper_class,
             'hide_help': self.hide_help,
+            'cache_dir': self.cache_dir,
+            'response_files': self.response_files,
+            'abbreviations': self.abbreviations,
+            'loop_factory': self.loop_factory,
             }
 
     @classmethod
@@ -192,14 +293,34 @@ class Clize(object):
     @util.property_once
     def signature(self):
         """The `.parser.CliSignature` object used to parse arguments."""
-        return parser.CliSignature.from_signature(
-            signature(self.func),
-            extra=itertools.chain(self._process_alt(self.alt), self.extra))
+        return parser.CliSignature(
+            itertools.chain(
+                self._func_parameters(),
+                self._process_alt(self.alt), self.extra),
+            abbreviations=self.abbreviations)
+
+    def _func_parameters(self):
+        cache_dir = util.get_cache_dir(self.cache_dir)
+        key = None
+        if cache_dir:
+            # only imported when needed, it is slow to import
+            from clize import _cache
+            key = _cache.func_key(self.func)
+        if not key:
+            return parser.CliSignature.convert_parameters(
+                signature(self.func))
+        try:
+            return _cache.load(cache_dir, 'signature', *key)
+        except KeyError:
+            pass
+        params = parser.CliSignature.convert_parameters(signature(self.func))
+        _cache.store(cache_dir, 'signature', key[0], key[1], params)
+        return params
 
     def _process_alt(self, alt):
         if self.help_names:
-            p = parser.FallbackCommandParameter(
-                func=self.helper.cli, undocumented=self.hide_help,
+            p = _HelpParameter(
+                cli=self, undocumented=self.hide_help,
                 aliases=self.help_aliases)
             yield p
 
@@ -213,7 +334,12 @@ class Clize(object):
     def __call__(self, *args):
         with errors.SetUserErrorContext(cli=self, pname=args[0]):
             func, name, posargs, kwargs = self.read_commandline(args)
-            return func(*posargs, **kwargs)
+            ret = func(*posargs, **kwargs)
+            if _iscoroutine(ret):
+                return _run_coroutine(ret, self.loop_factory)
+            if _isasyncgen(ret):
+                return StreamedOutput(ret, self.loop_factory, self, args[0])
+            return ret
 
     def read_commandline(self, args):
         """Reads the command-line arguments from args and returns a tuple
@@ -222,10 +348,28 @@ class Clize(object):
 
         :raises: `.ArgumentError`
         """
-        ba = self.signature.read_arguments(args[1:], args[0])
+        ba = self.signature.read_arguments(
+            args[1:], args[0], response_files=self.response_files)
         func, post, posargs, kwargs = ba
         name = ' '.join([args[0]] + post)
-        return func or self.func, name, posargs, kwargs
+        if func is None:
+            func = self.func
+        elif getattr(func, '_clize__wraps_target', False):
+            func = partial(func, self.func)
+        return func, name, posargs, kwargs
+
+class _HelpParameter(parser.FallbackCommandParameter):
+    """Fallback parameter that triggers the help. The helper, and with it
+    `clize.help`, is only loaded once the parameter is used."""
+
+    def __init__(self, cli, **kwargs):
+        super(parser.FallbackCommandParameter, self).__init__(**kwargs)
+        self.cli = cli
+
+    @util.property_once
+    def func(self):
+        return self.cli.helper.cli
+
 
 def _dispatcher_helper(*args, **kwargs):
     """alias for clize.help.DispatcherHelper, avoiding circular import"""
@@ -238,12 +382,77 @@ def lowercase(arg):
     return arg.lower()
 
 
+class _LazyHelper(object):
+    def __init__(self, command, description):
+        self.command = command
+        self.description = description
+
+    def __getattr__(self, name):
+        return getattr(self.command.command.helper, name)
+
+    def description_key(self):
+        return repr((self.command.path, self.description))
+
+
+class LazyCommand(object):
+    """A subcommand given by its import path, which is only imported when
+    the subcommand is run or its help is needed.
+
+    Strings passed as commands to `.SubcommandDispatcher` are converted to
+    this class.
+
+    :param str path: The object to import, as ``"package.module:name"``.
+    :param str description: The description shown in the list of commands.
+        If unset, showing the list imports the command to find it.
+    :param clizer: The class used to build a CLI once the object is
+        imported.
+    """
+
+    def __init__(self, path, description=None, clizer=Clize):
+        modname, sep, attrs = path.partition(':')
+        if not sep or not attrs:
+            raise ValueError(
+                'Expected "package.module:name", got {0!r}'.format(path))
+        self.path = path
+        self.__name__ = attrs.rpartition('.')[2]
+        self.description = description
+        self.clizer = clizer
+
+    @util.property_once
+    def command(self):
+        """The :ref:`cli object<cli-object>` for the imported object."""
+        modname, _, attrs = self.path.partition(':')
+        obj = importlib.import_module(modname)
+        for attr in attrs.split('.'):
+            obj = getattr(obj, attr)
+        return self.clizer.get_cli(obj)
+
+    @property
+    def helper(self):
+        if self.description is None:
+            return self.command.helper
+        return _LazyHelper(self, self.description)
+
+    @property
+    def cli(self):
+        """Returns the object itself, in order to be selected by
+        `.Clize.get_cli`"""
+        return self
+
+    def __call__(self, *args):
+        return self.command(*args)
+
+    def __repr__(self):
+        return '<LazyCommand for {0!r}>'.format(self.path)
+
+
 class SubcommandDispatcher(object):
     clizer = Clize
 
     def __init__(self, commands=(), description=None, footnotes=None):
         self.cmds, self.cmds_by_name = cli_commands(
             commands, namef=util.name_py2cli, clizer=self.clizer)
+        self._command_index = _suggest.Index(self.cmds_by_name)
         self.description = description
         self.footnotes = footnotes
 
@@ -254,7 +463,9 @@ class SubcommandDispatcher(object):
         try:
             func = self.cmds_by_name[command]
         except KeyError:
-            raise errors.ArgumentError('Unknwon command "{0}"'.format(command))
+            raise errors.ArgumentError('Unknwon command "{0}"{1}'.format(
+                command, errors.did_you_mean(
+                    self._command_index.closest(command))))
         return func('{0} {1}'.format(name, command), *args)
 
 
@@ -317,6 +528,10 @@ def run(args=None, catch=(), exit=True, out=None, err=None, *fn, **kwargs):
     as `clize.UserError` and prints their string representation, then exit with
     the appropriate status code.
 
+    Coroutine functions are run to completion on an event loop. The values
+    yielded by asynchronous generator functions are printed as they come,
+    see `.StreamedOutput`.
+
     :param sequence args: The arguments to pass the CLI, for instance
         ``('./a_script.py', 'spam', 'ham')``. If unspecified, uses `sys.argv`.
     :param catch: Catch these exceptions and print their string representation
@@ -347,6 +562,11 @@ def run(args=None, catch=(), exit=True, out=None, err=None, *fn, **kwargs):
 
     try:
         ret = cli(*args)
+        if isinstance(ret, StreamedOutput):
+            for value in ret:
+                if value is not None:
+                    print(value, file=out)
+            ret = None
     except tuple(catch) + (errors.UserError,) as exc:
         print(str(exc), file=err)
         if exit:
@@ -0,0 +1,233 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from six.moves import cStringIO
+from sigtools import support, modifiers
+
+from clize import parser, errors, parameters, runner, compile
+from clize.tests import test_parser, test_parameters
+from clize.tests.util import testfunc, read_arguments, run
+
+
+def compiled(csig):
+    namespace = {}
+    exec(compile.compile_signature(csig), namespace)
+    return namespace['read_arguments']
+
+
+def cases(cls):
+    return type('Compiled' + cls.__name__, (object,), dict(
+        (key, value) for key, value in vars(cls).items()
+        if isinstance(value, tuple) and not key.startswith('_')))
+
+
+def assertSameError(self, csig, args):
+    try:
+        read_arguments(csig, args)
+    except errors.ArgumentError as e:
+        expected = e
+    else:
+        self.fail('clize did not raise')
+    try:
+        compiled(csig)(args, 'test')
+    except errors.ArgumentError as e:
+        self.assertEqual(type(e), type(expected))
+        self.assertEqual(str(e), str(expected))
+        for attr in ('pos', 'val'):
+            self.assertEqual(
+                getattr(e, attr, None), getattr(expected, attr, None))
+        self.assertEqual(
+            getattr(getattr(e, 'param', None), 'display_name', None),
+            getattr(getattr(expected, 'param', None), 'display_name', None))
+    else:
+        self.fail('the compiled parser did not raise')
+
+
+@testfunc
+def compiledsigtests(self, sig_str, str_rep, args, posargs, kwargs):
+    sig = support.s(sig_str, locals={'P': parser.Parameter})
+    csig = parser.CliSignature.from_signature(sig)
+    self.assertEqual(
+        compiled(csig)(args, 'test'), tuple(read_arguments(csig, args)))
+
+
+CompiledSigTests = compiledsigtests(cases(test_parser.SigTests))
+
+
+@testfunc
+def compiledsigerrortests(self, sig_str, args, exc_typ, message):
+    csig = parser.CliSignature.from_signature(support.s(sig_str))
+    assertSameError(self, csig, args)
+
+
+CompiledSigErrorTests = compiledsigerrortests(
+    cases(test_parser.SigErrorTests))
+
+
+@testfunc
+def compiledextraparamstests(self, sig_str, extra, args, posargs, kwargs,
+                             func):
+    csig = parser.CliSignature.from_signature(support.s(sig_str), extra=extra)
+    self.assertEqual(compiled(csig)(args, 'test'), None)
+
+
+CompiledExtraParamsTests = compiledextraparamstests(
+    cases(test_parser.ExtraParamsTests))
+
+
+@testfunc
+def compiledannotatedtests(self, sig_info, in_args, args, kwargs):
+    sig_str, annotation, str_rep = sig_info
+    sig = support.s(sig_str, locals={'a': annotation})
+    csig = parser.CliSignature.from_signature(sig)
+    self.assertEqual(
+        compiled(csig)(in_args, 'test'), tuple(read_arguments(csig, in_args)))
+
+
+CompiledMultiTests = compiledannotatedtests(
+    cases(test_parameters.MultiTests))
+CompiledPnTests = compiledannotatedtests(cases(test_parameters.PnTests))
+
+
+@testfunc
+def compiledannotatederrortests(self, sig_info, in_args,
+                                exc=errors.BadArgumentFormat, message=None):
+    sig_str, annotation, str_rep = sig_info
+    sig = support.s(sig_str, locals={'a': annotation})
+    assertSameError(self, parser.CliSignature.from_signature(sig), in_args)
+
+
+CompiledMultiErrorTests = compiledannotatederrortests(
+    cases(test_parameters.MultiErrorTests))
+CompiledPnErrorTests = compiledannotatederrortests(
+    cases(test_parameters.PnErrorTests))
+
+
+@testfunc
+def compileerrortests(self, sig_str, locals):
+    csig = parser.CliSignature.from_signature(
+        support.s(sig_str, locals=locals))
+    self.assertRaises(ValueError, compile.compile_signature, csig)
+
+
+@compileerrortests
+class CompileErrorTests(object):
+    mapped = 'par:a', {'a': parameters.mapped([('a', ['b'], 'c')])}
+    decorator = 'par:a', {'a': parameters.argument_decorator(lambda x: x)}
+    local_conv = 'par:a', {'a': parser.value_converter(lambda arg: arg)}
+    flag_value = '*, par:a', {'a': parser.use_class(
+        named=parser.FlagParameter, kwargs={'value': object()})}
+
+
+@modifiers.kwoargs('flag', 'num')
+@modifiers.annotate(num=('n', int), name=parameters.pass_name)
+def _target(name, one, flag=False, num=0):
+    """Test target
+
+    one: a value
+    """
+    if one == 'fail':
+        raise errors.ArgumentError('failed')
+    return ' '.join([name, one, repr(flag), repr(num)])
+
+
+def _other(arg):
+    return 'other ' + arg
+
+
+_commands = [_target, _other]
+
+
+_response_files = runner.Clize(_other, response_files='lines')
+
+
+class CompileTargetTests(unittest.TestCase):
+    def run_main(self, target, *args):
+        namespace = {}
+        exec(compile.compile_target(target), namespace)
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = out = cStringIO()
+        sys.stderr = err = cStringIO()
+        try:
+            namespace['main'](list(args))
+        except SystemExit as e:
+            code = e.code
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        return code, out.getvalue(), err.getvalue()
+
+    def assertSameRun(self, target, func, *args):
+        code, out, err = self.run_main(target, *args)
+        expected_out, expected_err = run(func, args)
+        self.assertEqual(out, expected_out.getvalue())
+        self.assertEqual(err, expected_err.getvalue())
+        return code
+
+    def test_run(self):
+        t = 'clize.tests.test_compile:_target'
+        self.assertEqual(
+            self.assertSameRun(t, _target, 'prog', 'a', '--flag', '-n3'), None)
+        self.assertEqual(self.assertSameRun(t, _target, 'prog', 'fail'), 2)
+        self.assertEqual(self.assertSameRun(t, _target, 'prog'), 2)
+        self.assertSameRun(t, _target, 'prog', '--help')
+        self.assertSameRun(t, _target, 'prog', 'a', '--bad', '--help')
+
+    def test_dispatch(self):
+        t = 'clize.tests.test_compile:_commands'
+        self.assertSameRun(t, _commands, 'prog', 'target', 'a', '-n', '2')
+        self.assertSameRun(t, _commands, 'prog', 'OTHER', 'a')
+        self.assertSameRun(t, _commands, 'prog', 'target', 'fail')
+        self.assertSameRun(t, _commands, 'prog', 'unknown')
+        self.assertSameRun(t, _commands, 'prog', '--help')
+        self.assertSameRun(t, _commands, 'prog', 'other', '--help')
+
+    def test_bad_target(self):
+        self.assertRaises(ValueError, compile.compile_target, 'clize.runner')
+
+    def test_response_files(self):
+        self.assertRaises(
+            ValueError, compile.compile_target,
+            'clize.tests.test_compile:_response_files')
+
+    def test_abbreviations(self):
+        csig = parser.CliSignature.from_signature(
+            support.s('*, verbose=False'), abbreviations=True)
+        self.assertRaises(ValueError, compile.compile_signature, csig)
+
+    def test_command_line(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        with open(os.path.join(tmp, 'app.py'), 'w') as f:
+            f.write('def main(one, num=0):\n    return one * num\n')
+        script = os.path.join(tmp, 'script.py')
+        with open(script, 'w') as f:
+            f.write(
+                'import sys, fast\n'
+                'try:\n    fast.main()\n'
+                'except SystemExit:\n    pass\n'
+                'print("sigtools" in sys.modules)\n')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [tmp] + [p for p in sys.path if p])
+        subprocess.check_call([
+            sys.executable, '-m', 'clize.compile', 'app:main',
+            '-o', os.path.join(tmp, 'fast.py')], env=env)
+        out = subprocess.check_output(
+            [sys.executable, script, 'ab', '2'], env=env)
+        self.assertEqual(out.decode().split(), ['abab', 'False'])
+        out = subprocess.check_output(
+            [sys.executable, script, 'ab', 'x'], env=env,
+            stderr=subprocess.STDOUT)
+        self.assertEqual(out.decode().splitlines(), [
+            script + ": Bad value for num: 'x'",
+            'Usage: ' + script + ' one [num]',
+            'True',
+            ])
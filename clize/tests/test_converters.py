@@ -4,11 +4,14 @@
 
 from datetime import datetime
 import unittest
+import io
+import sys
 import tempfile
 import shutil
 import os
 import stat
 
+from dateutil.tz import tzutc
 from sigtools import support, modifiers
 
 from clize import parser, errors, converters
@@ -23,6 +26,7 @@ class ConverterRepTests(object):
         self.assertEqual(str(csig), rep)
 
     datetime = converters.datetime, '--par=TIME'
+    strict_datetime = converters.strict_datetime, '--par=TIME'
     file = converters.file(), '--par=FILE'
 
 
@@ -36,6 +40,61 @@ class ConverterTests(object):
 
     dt_jan1 = (
         converters.datetime, '2014-01-01 12:00', datetime(2014, 1, 1, 12, 0))
+    dt_iso_tz = (
+        converters.datetime, '2014-01-01T12:00:00+02:00',
+        datetime(2014, 1, 1, 10, 0, tzinfo=tzutc()))
+    dt_iso_z = (
+        converters.strict_datetime, '2014-01-01T12:00:00.5Z',
+        datetime(2014, 1, 1, 12, 0, 0, 500000, tzinfo=tzutc()))
+    dt_epoch = (
+        converters.strict_datetime, '@1400000000.25',
+        datetime(2014, 5, 13, 16, 53, 20, 250000, tzinfo=tzutc()))
+    dt_epoch_bare = (
+        converters.datetime, '1400000000',
+        datetime(2014, 5, 13, 16, 53, 20, tzinfo=tzutc()))
+    dt_compact = (
+        converters.datetime, '202610161230', datetime(2026, 10, 16, 12, 30))
+    dt_slashed = (
+        converters.strict_datetime, '2014/1/2 3:04:05.25',
+        datetime(2014, 1, 2, 3, 4, 5, 250000))
+    dt_slashed_date = (
+        converters.strict_datetime, '2014/01/02', datetime(2014, 1, 2))
+    dt_common_log = (
+        converters.strict_datetime, '16/Oct/2026:12:00:00 -0230',
+        datetime(2026, 10, 16, 14, 30, tzinfo=tzutc()))
+    dt_fallback = (
+        converters.datetime, 'Jan 1 2014 12:00', datetime(2014, 1, 1, 12, 0))
+
+
+class DatetimeConverterTests(unittest.TestCase):
+    def test_no_dateutil(self):
+        modules = dict(
+            (name, mod) for name, mod in sys.modules.items()
+            if name.startswith('dateutil'))
+        for name in modules:
+            del sys.modules[name]
+        sys.modules['dateutil'] = None
+        try:
+            self.assertEqual(
+                converters.datetime('2014-01-01'), datetime(2014, 1, 1))
+            self.assertRaises(ImportError, converters.datetime, 'Jan 1 2014')
+            self.assertRaises(
+                ValueError, converters.strict_datetime, 'Jan 1 2014')
+            self.assertRaises(
+                ValueError, converters.strict_datetime, '2014/13/01')
+        finally:
+            del sys.modules['dateutil']
+            sys.modules.update(modules)
+
+    def test_strict_error(self):
+        sig = support.s('*, par: c', locals={'c': converters.strict_datetime})
+        csig = parser.CliSignature.from_signature(sig)
+        try:
+            util.read_arguments(csig, ['--par', 'tomorrow'])
+        except errors.BadArgumentFormat as exc:
+            self.assertEqual(exc.message, "Bad value for --par: 'tomorrow'")
+        else:
+            self.fail('BadArgumentFormat not raised')
 
 
 class FileConverterTests(unittest.TestCase):
@@ -123,6 +182,115 @@ class FileConverterTests(unittest.TestCase):
         self.assertRaises(errors.BadArgumentFormat,
                           self.run_conv, converters.file(mode='w'), path)
 
+    def test_mmap(self):
+        path = os.path.join(self.temp, 'afile')
+        with open(path, 'wb') as f:
+            f.write(b'hello\nworld\n')
+        opener = self.run_conv(
+            converters.file(mmap=True, advice='sequential'), path)
+        with opener as data:
+            self.assertEqual(data[:5], b'hello')
+            self.assertEqual(data.find(b'world'), 6)
+            view = memoryview(data)
+            self.assertEqual(view[6:11].tobytes(), b'world')
+            view.release()
+        self.assertTrue(data.closed)
+        self.assertTrue(opener.f.closed)
+
+    def test_mmap_empty(self):
+        path = os.path.join(self.temp, 'afile')
+        open(path, 'w').close()
+        opener = self.run_conv(converters.file(mmap=True), path)
+        with opener as data:
+            self.assertEqual(data, b'')
+        self.assertTrue(opener.f.closed)
+
+    def test_mmap_missing(self):
+        path = os.path.join(self.temp, 'afile')
+        self.assertRaises(errors.BadArgumentFormat,
+                          self.run_conv, converters.file(mmap=True), path)
+
+    def test_mmap_write(self):
+        self.assertRaises(ValueError, converters.file, mmap=True, mode='r+')
+        self.assertRaises(ValueError, converters.file, mmap=True, mode='w')
+
+    def test_advice(self):
+        self.assertRaises(ValueError, converters.file, advice='soon')
+        path = os.path.join(self.temp, 'afile')
+        with open(path, 'w') as f:
+            f.write('abc')
+        for advice in ('sequential', 'random', 'willneed'):
+            conv = converters.file(advice=advice, buffering=1 << 20)
+            with self.run_conv(conv, path) as f:
+                self.assertEqual(f.read(), 'abc')
+
+    def test_advice_error(self):
+        class Mapped(object):
+            def madvise(self, flag):
+                raise OSError(22, 'Invalid argument')
+        with open(os.path.join(self.temp, 'afile'), 'w') as f:
+            for advice in ('sequential', 'random', 'willneed'):
+                converters._advise(f, Mapped(), advice)
+
+    def swap_stdio(self, stdin, stdout):
+        orig = sys.stdin, sys.stdout
+        sys.stdin, sys.stdout = stdin, stdout
+        self.addCleanup(setattr, sys, 'stdout', orig[1])
+        self.addCleanup(setattr, sys, 'stdin', orig[0])
+
+    def test_stdio(self):
+        stdin = io.TextIOWrapper(io.BytesIO(b'in\n'))
+        stdout = io.TextIOWrapper(io.BytesIO())
+        self.swap_stdio(stdin, stdout)
+        with self.run_conv(converters.file(), '-') as f:
+            self.assertTrue(f is stdin)
+            self.assertEqual(f.read(), 'in\n')
+        with self.run_conv(converters.file(mode='wb'), '-') as f:
+            self.assertTrue(f is stdout.buffer)
+            f.write(b'out')
+        self.assertFalse(stdin.closed)
+        self.assertFalse(stdout.closed)
+        self.assertEqual(stdout.buffer.getvalue(), b'out')
+
+    def test_stdio_mmap(self):
+        r, w = os.pipe()
+        os.write(w, b'hello\n')
+        os.close(w)
+        stdin = io.open(r, 'r')
+        self.addCleanup(stdin.close)
+        self.swap_stdio(stdin, io.TextIOWrapper(io.BytesIO()))
+        with self.run_conv(converters.file(mmap=True), '-') as data:
+            self.assertEqual(data, b'hello\n')
+        self.assertFalse(stdin.closed)
+
+    def test_stdio_buffering(self):
+        path = os.path.join(self.temp, 'afile')
+        with open(path, 'wb') as f:
+            f.write(b'in')
+        stdin = open(path, 'rb')
+        stdout = open(os.path.join(self.temp, 'out'), 'w')
+        self.addCleanup(stdin.close)
+        self.addCleanup(stdout.close)
+        self.swap_stdio(stdin, stdout)
+        conv = converters.file(mode='rb', buffering=1 << 20)
+        with self.run_conv(conv, '-') as f:
+            self.assertEqual(f.read(), b'in')
+        stdout.write('a')
+        conv = converters.file(mode='ab', buffering=1 << 20)
+        with self.run_conv(conv, '-') as f:
+            f.write(b'b')
+        self.assertTrue(f.closed)
+        self.assertFalse(stdin.closed)
+        self.assertFalse(stdout.closed)
+        with open(stdout.name) as f:
+            self.assertEqual(f.read(), 'ab')
+
+    def test_stdio_disabled(self):
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.temp)
+        self.assertRaises(errors.BadArgumentFormat,
+                          self.run_conv, converters.file(stdio=None), '-')
+
     def test_race(self):
         path = os.path.join(self.temp, 'afile')
         open(path, mode='w').close()
@@ -137,6 +305,173 @@ class FileConverterTests(unittest.TestCase):
             'test: Permission denied: '))
 
 
+def _names(count, prefix='f'):
+    return ['{0}{1}'.format(prefix, i) for i in range(count)]
+
+
+def _files_tree(test):
+    temp = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, temp)
+    for name in _names(200):
+        open(os.path.join(temp, name), 'w').close()
+    return temp
+
+
+@util.repeated_test
+class FilesConverterTests(object):
+    def _test_func(self, conv, names, pos=None, message=None):
+        temp = _files_tree(self)
+        args = [name if name == '-' else os.path.join(temp, *name.split('/'))
+                for name in names]
+        sig = support.s('*par: c', locals={'c': conv})
+        csig = parser.CliSignature.from_signature(sig)
+        if pos is None:
+            openers = util.read_arguments(csig, args).args
+            self.assertEqual([opener.arg for opener in openers], args)
+            return
+        with self.assertRaises(errors.BadArgumentFormat) as cm:
+            util.read_arguments(csig, args)
+        self.assertEqual(cm.exception.pos, pos)
+        self.assertEqual(cm.exception.val, args[pos])
+        self.assertTrue(message in str(cm.exception))
+
+    read = converters.files(), _names(200) + ['-']
+    empty = converters.files(), []
+    jobs_1 = converters.files(jobs=1), _names(200)
+    jobs_2 = converters.files(jobs=2), _names(200)
+    write = converters.files(mode='w'), _names(100, 'new') + _names(100)
+
+    first_missing = (
+        converters.files(),
+        _names(150) + ['missing1'] + _names(19) + ['missing2'],
+        150, 'File does not exist')
+    first_arg_missing = (
+        converters.files(), ['x'] + _names(199), 0, 'File does not exist')
+    missing_dir = (
+        converters.files(mode='w'), _names(200) + ['nodir/f0'],
+        200, 'Directory does not exist')
+
+    def test_open(self):
+        temp = _files_tree(self)
+        sig = support.s('*par: c', locals={'c': converters.files()})
+        csig = parser.CliSignature.from_signature(sig)
+        path = os.path.join(temp, 'f0')
+        openers = util.read_arguments(csig, [path, '-']).args
+        self.assertTrue(openers[1].stdio)
+        with openers[0] as f:
+            self.assertEqual(f.name, path)
+
+    def test_symlink(self):
+        if not hasattr(os, 'symlink'):
+            self.skipTest('symbolic links unsupported')
+        temp = _files_tree(self)
+        os.symlink(
+            os.path.join(temp, 'missing'), os.path.join(temp, 'broken'))
+        self._test_func(
+            converters.files(), ['f0', 'f1', 'broken'], 2,
+            'File does not exist')
+
+    def test_message(self):
+        temp = _files_tree(self)
+        @modifiers.annotate(afiles=converters.files())
+        def func(*afiles):
+            raise NotImplementedError
+        stdout, stderr = util.run(func, [
+            'test', os.path.join(temp, 'f0'), os.path.join(temp, 'missing')])
+        self.assertFalse(stdout.getvalue())
+        self.assertTrue(stderr.getvalue().startswith(
+            'test: Bad value for afiles: File does not exist: '))
+
+
+def _paths_tree(test):
+    temp = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, temp)
+    for path in ['logs/a/b', 'logs/.hidden', 'other']:
+        os.makedirs(os.path.join(temp, *path.split('/')))
+    for path in ['logs/x.gz', 'logs/a/y.gz', 'logs/a/b/z.gz',
+                 'logs/a/b/w.txt', 'logs/.hidden/h.gz', 'other/q.gz']:
+        open(os.path.join(temp, *path.split('/')), 'w').close()
+    return temp
+
+
+@util.repeated_test
+class PathsConverterTests(object):
+    def _test_func(self, conv, args, expected, sig_str='*par: c'):
+        temp = _paths_tree(self)
+        sig = support.s(sig_str, locals={'c': conv})
+        csig = parser.CliSignature.from_signature(sig)
+        ret = util.read_arguments(csig, [temp + '/' + arg for arg in args])
+        self.assertEqual(
+            [[os.path.relpath(path, temp).replace(os.sep, '/')
+              for path in paths]
+             for paths in ret.args],
+            expected)
+
+    wildcards = (
+        converters.paths(), ['logs/*', 'logs/?/*.gz'],
+        [['logs/a', 'logs/x.gz'], ['logs/a/y.gz']])
+    recursive = (
+        converters.paths(), ['logs/**/*.gz', 'logs/a/**'],
+        [['logs/x.gz', 'logs/a/y.gz', 'logs/a/b/z.gz'],
+         ['logs/a/b', 'logs/a/b/w.txt', 'logs/a/b/z.gz', 'logs/a/y.gz']])
+    braces = (
+        converters.paths(), ['{other,logs}/*.gz'],
+        [['other/q.gz', 'logs/x.gz']])
+    hidden = (
+        converters.paths(), ['logs/.*/*', 'logs/**/h.gz'],
+        [['logs/.hidden/h.gz'], []])
+    literal = (
+        converters.paths(), ['other/q.gz', 'other/none'],
+        [['other/q.gz'], []])
+    filters = (
+        converters.paths(include=['*.gz', '*.txt'], exclude=['b']),
+        ['logs/**'], [['logs/a/y.gz', 'logs/x.gz']])
+    exclude = converters.paths(exclude=['x*']), ['logs/*'], [['logs/a']]
+    no_dedupe = (
+        converters.paths(), ['logs/**/*.gz', 'logs/a/*.gz'],
+        [['logs/x.gz', 'logs/a/y.gz', 'logs/a/b/z.gz'], ['logs/a/y.gz']])
+    dedupe = (
+        converters.paths(dedupe=True), ['logs/**/*.gz', 'logs/a/*.gz'],
+        [['logs/x.gz', 'logs/a/y.gz', 'logs/a/b/z.gz'], []])
+    positional = (
+        converters.paths(), ['other/*'], [['other/q.gz']], 'par: c')
+
+    def test_lazy(self):
+        temp = _paths_tree(self)
+        sig = support.s('par: c', locals={'c': converters.paths()})
+        csig = parser.CliSignature.from_signature(sig)
+        ba = util.read_arguments(csig, [os.path.join(temp, 'other', '*')])
+        paths = ba.args[0]
+        self.assertEqual(iter(paths), paths)
+        open(os.path.join(temp, 'other', 'r.gz'), 'w').close()
+        self.assertEqual(
+            [os.path.basename(path) for path in paths], ['q.gz', 'r.gz'])
+
+
+@util.repeated_test
+class BraceTests(object):
+    def _test_func(self, pattern, expected):
+        self.assertEqual(converters._braces(pattern), expected)
+
+    nested = (
+        'a{b,c{d,e}}f{g,}', ['abfg', 'abf', 'acdfg', 'acdf', 'acefg', 'acef'])
+    unbalanced = '{x{a,b}', ['{xa', '{xb']
+    no_comma = '{a}', ['{a}']
+    plain = 'a/*.gz', ['a/*.gz']
+
+
+@util.repeated_test
+class BadConverterParamTests(object):
+    def _test_func(self, sig_str, conv):
+        sig = support.s(sig_str, locals={'c': conv})
+        self.assertRaises(
+            ValueError, parser.CliSignature.from_signature, sig)
+
+    files_pos = 'par: c', converters.files()
+    files_named = '*, par: c', converters.files()
+    paths_named = '*, par: c', converters.paths()
+
+
 @util.repeated_test
 class ConverterErrorTests(object):
     def _test_func(self, conv, inp):
@@ -2,12 +2,15 @@
 # Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
 # See COPYING for details.
 
+import shutil
+import tempfile
+import unittest
 from itertools import count
 
 from sigtools.support import f
 from sigtools.wrappers import wrapper_decorator
 
-from clize import runner, help, parser
+from clize import runner, help, parser, parameters, util
 from clize.tests.util import repeated_test
 
 USAGE_HELP = 'func --help [--usage]'
@@ -825,3 +828,80 @@ class DispatcherHelper(object):
             func
         """)
 
+
+
+class HelpCacheTests(unittest.TestCase):
+    def setUp(self):
+        help._help_cache.clear()
+        self.addCleanup(help._help_cache.clear)
+
+    def func(self, doc='Description'):
+        func = f('one, *, two')
+        func.__doc__ = doc
+        return func
+
+    def no_render(self, *args):
+        raise AssertionError('help was rendered again')
+
+    def test_memory(self):
+        cli = runner.Clize(self.func())
+        text = cli.helper.cli('func --help')
+        self.assertTrue('Description' in text)
+        helper = runner.Clize(self.func()).helper
+        helper.render = self.no_render
+        self.assertEqual(helper.cli('func --help'), text)
+
+    def test_invalidated(self):
+        text = runner.Clize(self.func()).helper.cli('func --help')
+        text2 = runner.Clize(self.func('Other')).helper.cli('func --help')
+        self.assertTrue('Other' in text2)
+        self.assertNotEqual(text, text2)
+        orig = util.get_terminal_width
+        util.get_terminal_width = lambda: 20
+        try:
+            text3 = runner.Clize(self.func()).helper.cli('func --help')
+        finally:
+            util.get_terminal_width = orig
+        self.assertNotEqual(text, text3)
+
+    def test_disk(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        text = runner.Clize(self.func(), cache_dir=tmp).helper.cli(
+            'func --help')
+        help._help_cache.clear()
+        helper = runner.Clize(self.func(), cache_dir=tmp).helper
+        helper.render = self.no_render
+        self.assertEqual(helper.cli('func --help'), text)
+
+    def test_usage_not_cached(self):
+        helper = runner.Clize(self.func()).helper
+        helper.cli('func --help', '--usage')
+        self.assertEqual(help._help_cache, {})
+
+    def test_unknown_prepare_help(self):
+        class Param(parser.PositionalParameter):
+            def prepare_help(self, helper):
+                raise NotImplementedError
+        func = f('one:a', locals={'a': Param(
+            display_name='one', argument_name='one')})
+        self.assertEqual(runner.Clize(func).helper.cache_key(), None)
+
+    def test_decorator_doc(self):
+        @parameters.argument_decorator
+        def deco(arg):
+            """Decorator doc"""
+            raise NotImplementedError
+        func = f('one:a', locals={'a': deco})
+        key = runner.Clize(func).helper.cache_key()
+        self.assertTrue('Decorator doc' in key)
+
+    def test_dispatcher(self):
+        cmd = runner.LazyCommand(
+            'clize.tests.test_runner:_lazy_target', description='Lazy')
+        sd = runner.SubcommandDispatcher([cmd, self.func()])
+        text = sd.cli.helper.cli('sd --help')
+        self.assertFalse('command' in vars(cmd))
+        helper = runner.SubcommandDispatcher([cmd, self.func()]).cli.helper
+        helper.render = self.no_render
+        self.assertEqual(helper.cli('sd --help'), text)
@@ -0,0 +1,51 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+import sys
+import unittest
+
+import clize
+from clize.tests.util import imported_modules
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'requires PEP 562')
+class LazyImportTests(unittest.TestCase):
+    heavy = (
+        'clize.parser', 'clize.runner', 'clize.legacy', 'clize.help',
+        'clize.parameters', 'sigtools', 'sigtools.modifiers',
+        'sigtools.specifiers', 'sigtools.wrappers', 'six',
+        )
+
+    def test_import_clize(self):
+        modules = imported_modules('import clize')
+        self.assertTrue('clize' in modules)
+        for name in self.heavy:
+            self.assertFalse(name in modules, name)
+
+    def test_run_does_not_import_legacy(self):
+        modules = imported_modules('import clize; clize.run')
+        self.assertTrue('clize.runner' in modules)
+        self.assertFalse('clize.legacy' in modules)
+
+    def test_errors_only(self):
+        modules = imported_modules('from clize import UserError')
+        self.assertTrue('clize.errors' in modules)
+        self.assertFalse('clize.parser' in modules)
+        self.assertFalse('sigtools' in modules)
+
+    def test_names(self):
+        from clize import parser, runner, legacy, errors
+        self.assertTrue(clize.Parameter is parser.Parameter)
+        self.assertTrue(clize.Clize is runner.Clize)
+        self.assertTrue(clize.SubcommandDispatcher
+                        is runner.SubcommandDispatcher)
+        self.assertTrue(clize.run is runner.run)
+        self.assertTrue(clize.clize is legacy.clize)
+        self.assertTrue(clize.make_flag is legacy.make_flag)
+        self.assertTrue(clize.UserError is errors.UserError)
+        self.assertTrue(clize.ArgumentError is errors.ArgumentError)
+        self.assertTrue(set(clize.__all__) <= set(dir(clize)))
+
+    def test_unknown_name(self):
+        self.assertRaises(AttributeError, getattr, clize, 'spam')
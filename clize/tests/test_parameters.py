@@ -2,6 +2,12 @@
 # Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
 # See COPYING for details.
 
+import array
+import os
+import tempfile
+import unittest
+from functools import partial
+
 from sigtools import support, modifiers
 
 from clize import parser, errors, Parameter, runner, parameters
@@ -54,6 +60,28 @@ def annotated_sigerror_tests(self, sig_info, in_args,
             self.assertEqual('Error: ' + message, str(e))
 
 
+def _consumed(value):
+    try:
+        if iter(value) is value:
+            return list(value)
+    except TypeError:
+        pass
+    return value
+
+
+@util.testfunc
+def lazy_sigtests(self, sig_info, in_args, args, kwargs):
+    """Like `annotated_sigtests`, for parameters that receive iterators,
+    which are consumed before they are compared."""
+    sig_str, annotation, str_rep = sig_info
+    sig = support.s(sig_str, locals={'a': annotation})
+    csig = parser.CliSignature.from_signature(sig)
+    ba = util.read_arguments(csig, in_args)
+    self.assertEqual([_consumed(arg) for arg in ba.args], args)
+    self.assertEqual(
+        dict((key, _consumed(val)) for key, val in ba.kwargs.items()), kwargs)
+
+
 @check_repr
 class RepTests(object):
     mapped_basic = ('par:a', parameters.mapped([
@@ -192,6 +220,35 @@ class RepTests(object):
     pn_pos_nextpicky = 'par:a, other:int', parameters.pass_name, 'other'
     pn_kw = '*, par:a', parameters.pass_name, ''
 
+    stream = (
+        'one, par:a, *, flag=False', parameters.stream, '[--flag] one par...')
+    stream_conv = 'par:a', (parameters.stream, int), 'par...'
+    stream_optional = 'par:a=None', parameters.stream, '[par...]'
+
+    lazy = (
+        'one, par:a, *, opt:a', (parameters.multi(lazy=True, max=3), int),
+        '[--opt=INT...] one [par...]')
+    lazy_min = (
+        'one, par:a, *, opt:a', (parameters.multi(lazy=True, min=2), int),
+        '--opt=INT... one par...')
+    lazy_min_pos = (
+        'one, par:a', (parameters.multi(lazy=True, min=2), int),
+        'one par...')
+    lazy_default = (
+        'one, par:a=None, *, opt:a=None', (parameters.multi(lazy=True), int),
+        '[--opt=INT...] one [par...]')
+
+    array = (
+        'one, par:a, *, opt:a', parameters.array('d', max=4),
+        '[--opt=FLOAT...] one [par...]')
+    array_int = '*, opt:a', parameters.array('q'), '[--opt=INT...]'
+    array_min = 'one, par:a', parameters.array('d', min=2), 'one par...'
+    array_nosep = (
+        'one, par:a', parameters.array('d', separator=None), 'one [par...]')
+    array_default = (
+        'one, par:a=None, *, opt:a=None', parameters.array('d'),
+        '[--opt=FLOAT...] one [par...]')
+
 
 @test_bad_param
 class BadParamTests(object):
@@ -203,6 +260,9 @@ class BadParamTests(object):
     pn_varargs = '*par: a', parameters.pass_name
     pn_varkwargs = '**par: a', parameters.pass_name
 
+    lazy_varargs = '*par: a', parameters.multi(lazy=True)
+    array_varargs = '*par: a', parameters.array('d')
+
 
 @annotated_sigtests
 class MappedTests(object):
@@ -693,3 +753,275 @@ class PnErrorTests(object):
             util.read_arguments(csig, ('bad',))
         except errors.BadArgumentFormat as exc:
             self.assertEqual(exc.param.display_name, 'other')
+
+
+@lazy_sigtests
+class StreamTests(object):
+    stream = (
+        RepTests.stream, ('--flag', 'a', 'b', '--flag', 'c'),
+        ['a', ['b', '--flag', 'c']], {'flag': True})
+    conv = RepTests.stream_conv, ('1', '2'), [[1, 2]], {}
+    optional = RepTests.stream_optional, (), [], {}
+
+    def test_conv_error(self):
+        sig_str, annotation, str_rep = RepTests.stream_conv
+        sig = support.s(sig_str, locals={'a': annotation})
+        csig = parser.CliSignature.from_signature(sig)
+        for in_args, pos in [(('1', 'x', '3'), 1), (('1', '--flag', '3'), 1)]:
+            it = util.read_arguments(csig, in_args).args[0]
+            self.assertEqual(next(it), 1)
+            try:
+                next(it)
+            except errors.BadArgumentFormat as exc:
+                self.assertEqual(exc.pos, pos)
+                self.assertEqual(exc.val, in_args[pos])
+                self.assertTrue('Bad value for par: ' in str(exc))
+            else:
+                self.fail('BadArgumentFormat not raised')
+
+    def test_run(self):
+        @modifiers.annotate(par=(parameters.stream, int))
+        def func(par):
+            return ' '.join(str(p) for p in par)
+        stdout, stderr = util.run(func, ['test', '1', 'x', '3'])
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertTrue(
+            stderr.getvalue().startswith("test: Bad value for par: 'x'"))
+
+    def test_response_file(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('b\nc\n')
+        sig_str, annotation, str_rep = RepTests.stream
+        sig = support.s(sig_str, locals={'a': annotation})
+        csig = parser.CliSignature.from_signature(sig)
+        ba = csig.read_arguments(
+            ('a', '@' + path, 'd'), 'test', response_files='lines')
+        self.assertEqual(ba.in_args._items, ['a', 'b'])
+        self.assertEqual(list(ba.args[1]), ['b', 'c', 'd'])
+
+
+@annotated_sigerror_tests
+class StreamErrorTests(object):
+    required = RepTests.stream, ('a',), errors.MissingRequiredArguments
+
+
+def _parallel_target(prefix, *items):
+    if 'bad' in items:
+        raise errors.UserError('bad item')
+    if 'none' in items:
+        return None
+    return '{0}:{1}:{2}'.format(prefix, '+'.join(items), os.getpid())
+
+
+class ParallelTests(unittest.TestCase):
+    def cli(self, **kwargs):
+        return runner.Clize(modifiers.annotate(
+            items=parameters.parallel(**kwargs))(_parallel_target))
+
+    def test_repr(self):
+        cli = self.cli()
+        self.assertEqual(str(cli.signature), '[-j INT] prefix [items...]')
+
+    def test_bad_executor(self):
+        self.assertRaises(ValueError, parameters.parallel, executor='x')
+        self.assertRaises(ValueError, parameters.parallel, chunksize=0)
+
+    def test_threads(self):
+        ret = self.cli(executor='thread')('test', 'p', 'a', 'b', 'c')
+        self.assertEqual(
+            [line.rsplit(':', 1)[0] for line in ret.split('\n')],
+            ['p:a', 'p:b', 'p:c'])
+
+    def test_processes(self):
+        ret = self.cli(jobs=2)('test', 'p', 'a', 'b')
+        lines = ret.split('\n')
+        self.assertEqual(
+            [line.rsplit(':', 1)[0] for line in lines], ['p:a', 'p:b'])
+        self.assertFalse(str(os.getpid()) in
+                         [line.rsplit(':', 1)[1] for line in lines])
+
+    def test_single_job(self):
+        ret = self.cli(executor='thread')('test', '-j1', 'p', 'a', 'b')
+        self.assertEqual(
+            ret, 'p:a:{0}\np:b:{0}'.format(os.getpid()))
+
+    def test_chunks(self):
+        ret = self.cli(executor='thread', chunksize=2)(
+            'test', 'p', 'a', 'b', 'c')
+        self.assertEqual(
+            [line.rsplit(':', 1)[0] for line in ret.split('\n')],
+            ['p:a+b', 'p:c'])
+
+    def test_unordered(self):
+        ret = self.cli(executor='thread', ordered=False)(
+            'test', 'p', 'a', 'b', 'c')
+        self.assertEqual(
+            sorted(line.rsplit(':', 1)[0] for line in ret.split('\n')),
+            ['p:a', 'p:b', 'p:c'])
+
+    def test_none(self):
+        cli = self.cli(executor='thread')
+        self.assertEqual(cli('test', 'p', 'none', 'none'), None)
+        ret = cli('test', 'p', 'none', 'a')
+        self.assertEqual(ret.rsplit(':', 1)[0], 'p:a')
+
+    def test_error(self):
+        stdout, stderr = util.run(
+            self.cli(executor='thread'), ['test', 'p', 'a', 'bad', 'c'])
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(stderr.getvalue(), 'test: bad: bad item\n')
+        stdout, stderr = util.run(
+            self.cli(executor='thread', chunksize=2),
+            ['test', 'p', 'bad', 'c'])
+        self.assertEqual(stderr.getvalue(), 'test: bad c: bad item\n')
+
+    def test_no_values(self):
+        ret = self.cli(executor='thread')('test', 'p')
+        self.assertEqual(ret, 'p::{0}'.format(os.getpid()))
+
+    def test_single_job_error(self):
+        calls = []
+        @modifiers.annotate(items=parameters.parallel(executor='thread'))
+        def func(*items):
+            calls.extend(items)
+            if 'bad' in items:
+                raise errors.UserError('bad item')
+        stdout, stderr = util.run(func, ['work', '-j1', 'a', 'bad', 'c', 'd'])
+        self.assertEqual(stderr.getvalue(), 'work: bad: bad item\n')
+        self.assertEqual(calls, ['a', 'bad'])
+
+    def test_bad_jobs(self):
+        self.assertRaises(
+            errors.BadArgumentFormat, self.cli().read_commandline,
+            ('test', '-j0', 'p', 'a'))
+
+    def test_help(self):
+        func, name, posargs, kwargs = self.cli().read_commandline(
+            ('test', '--help'))
+        self.assertFalse(isinstance(func, partial))
+
+
+@lazy_sigtests
+class LazyMultiTests(object):
+    lazy = (
+        RepTests.lazy, ('x', '1', '--opt', '3', '2', '--opt=4'),
+        ['x', [1, 2]], {'opt': [3, 4]})
+    none = RepTests.lazy, ('x',), ['x', []], {'opt': []}
+    default = RepTests.lazy_default, ('x',), ['x'], {'opt': []}
+
+    def test_bad_value(self):
+        sig_str, annotation, str_rep = RepTests.lazy
+        sig = support.s(sig_str, locals={'a': annotation})
+        csig = parser.CliSignature.from_signature(sig)
+        it = util.read_arguments(csig, ('x', '1', 'y', '3')).args[1]
+        self.assertEqual(next(it), 1)
+        try:
+            next(it)
+        except errors.BadArgumentFormat as exc:
+            self.assertEqual(exc.pos, 2)
+            self.assertEqual(exc.val, 'y')
+            self.assertEqual(exc.param.display_name, 'par')
+        else:
+            self.fail('BadArgumentFormat not raised')
+        self.assertEqual(next(it), 3)
+
+    def test_run(self):
+        def func(paths):
+            return ' '.join(str(p) for p in paths)
+        func = modifiers.annotate(paths=(parameters.multi(lazy=True), int))(
+            func)
+        stdout, stderr = util.run(func, ['test', '1', 'a'])
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertTrue(
+            stderr.getvalue().startswith("test: Bad value for paths: 'a'"))
+
+
+@annotated_sigerror_tests
+class LazyMultiErrorTests(object):
+    max_passed = RepTests.lazy, ('x', '1', '2', '3', '4'), errors.TooManyValues
+    min_not_met = RepTests.lazy_min_pos, ('x', '1'), errors.NotEnoughValues
+    opt_min_not_met = (
+        RepTests.lazy_min, ('x', '1', '2', '--opt=1'), errors.NotEnoughValues)
+    opt_missing = (
+        RepTests.lazy_min, ('x', '1', '2'), errors.MissingRequiredArguments)
+
+
+try:
+    import numpy
+except ImportError: # pragma: no cover
+    numpy = None
+
+
+@annotated_sigtests
+class ArrayTests(object):
+    values = (
+        RepTests.array, ('x', '1', '--opt', '3,4', '2.5,3', '--opt=5'),
+        ['x', array.array('d', [1, 2.5, 3])],
+        {'opt': array.array('d', [3, 4, 5])})
+    none = (
+        RepTests.array, ('x',), ['x', array.array('d')],
+        {'opt': array.array('d')})
+    default = (
+        RepTests.array_default, ('x',), ['x'], {'opt': array.array('d')})
+    int_values = (
+        RepTests.array_int, ('--opt', '3,4', '--opt=5'), [],
+        {'opt': array.array('q', [3, 4, 5])})
+    no_separator = (
+        RepTests.array_nosep, ('x', '1', '2'),
+        ['x', array.array('d', [1, 2])], {})
+    min_met = (
+        RepTests.array_min, ('x', '1,2'), ['x', array.array('d', [1, 2])], {})
+
+    def test_bad_typecode(self):
+        for typecode in ('x', 'u', 'w', '', 'ii'):
+            self.assertRaises(ValueError, parameters.array, typecode)
+
+    @unittest.skipIf(numpy is None, 'requires NumPy')
+    def test_numpy(self):
+        sig = support.s('one, par:a, *, opt:b', locals={
+            'a': parameters.array('d', dtype='float32'),
+            'b': parameters.array('q', dtype=numpy.int16)})
+        csig = parser.CliSignature.from_signature(sig)
+        ba = util.read_arguments(csig, ('x', '1', '2,3', '--opt=1'))
+        self.assertEqual(ba.args[1].dtype, numpy.float32)
+        self.assertEqual(list(ba.args[1]), [1, 2, 3])
+        self.assertEqual(ba.kwargs['opt'].dtype, numpy.int16)
+        sig = support.s('*, opt:a', locals={
+            'a': parameters.array('q', dtype='int64')})
+        csig = parser.CliSignature.from_signature(sig)
+        self.assertRaises(
+            errors.BadArgumentFormat, util.read_arguments, csig,
+            ('--opt=1.5',))
+
+
+@annotated_sigerror_tests
+class ArrayErrorTests(object):
+    max_passed = RepTests.array, ('x', '1,2', '3', '4,5'), errors.TooManyValues
+    min_not_met = RepTests.array_min, ('x', '1'), errors.NotEnoughValues
+    no_separator = RepTests.array_nosep, ('x', '1,2')
+    bad_value = RepTests.array, ('x', '1', '2,y', '3')
+    empty_value = RepTests.array, ('x', '1', '2,', '3')
+    float_to_int = RepTests.array_int, ('--opt', '1,2', '--opt=1.5')
+    overflow = RepTests.array_int, ('--opt', str(2 ** 64))
+
+    def test_bad_value_context(self):
+        for sig_info, in_args, pos, text in [
+                (RepTests.array, ('x', '1', '2,y', '3'), 2, "'y'"),
+                (RepTests.array, ('x', '1', '2,', '3'), 2, "''"),
+                (RepTests.array_int, ('--opt', '1,2', '--opt=1.5'), 2,
+                 "'1.5'"),
+                (RepTests.array_int, ('--opt', str(2 ** 64)), 0, None),
+                ]:
+            sig_str, annotation, str_rep = sig_info
+            sig = support.s(sig_str, locals={'a': annotation})
+            csig = parser.CliSignature.from_signature(sig)
+            try:
+                util.read_arguments(csig, in_args)
+            except errors.BadArgumentFormat as exc:
+                self.assertEqual(exc.pos, pos)
+                if text is not None:
+                    self.assertEqual(exc.text, text)
+            else:
+                self.fail('BadArgumentFormat not raised')
@@ -2,9 +2,14 @@
 # Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
 # See COPYING for details.
 
+import os
+import shutil
+import tempfile
+import unittest
+
 from sigtools import support, modifiers, specifiers
 
-from clize import parser, errors, util
+from clize import parser, errors, util, _argfiles, _suggest
 from clize.tests.util import repeated_test, testfunc, read_arguments
 
 
@@ -314,6 +319,96 @@ class SigTests(object):
 
     ignored = 'one:P.I', '', (), [], {}
 
+    def test_option_tables(self):
+        params = [
+            parser.FlagParameter(
+                value=True, conv=parser.is_true,
+                aliases=aliases, argument_name=aliases[0].lstrip('-'))
+            for aliases in (['--one', '-a'], [u'-\u03b2'])]
+        csig = parser.CliSignature(params)
+        self.assertTrue(csig.short_options[ord('a')] is params[0])
+        self.assertTrue(csig.long_options['--one'] is params[0])
+        self.assertTrue(csig.short_option(u'\u03b2') is params[1])
+        self.assertTrue(csig.short_option('b') is None)
+        ba = read_arguments(csig, [u'-\u03b2a'])
+        self.assertEqual(ba.kwargs, {'one': True, u'\u03b2': True})
+
+    def test_arguments_overlay(self):
+        base = ('a', 'b', 'c')
+        overlay = parser._ArgumentsOverlay(base, 1, 'x')
+        self.assertEqual(len(overlay), 3)
+        self.assertEqual(overlay[1], 'x')
+        self.assertEqual(overlay[-2], 'x')
+        self.assertEqual(overlay[2], 'c')
+        self.assertEqual(overlay[1:], ('x', 'c'))
+        self.assertEqual(list(overlay), ['a', 'x', 'c'])
+        self.assertEqual(overlay, base[:1] + ('x',) + base[2:])
+        nested = parser._ArgumentsOverlay(overlay, 1, 'y')
+        self.assertTrue(nested.base is base)
+        self.assertEqual(tuple(nested), ('a', 'y', 'c'))
+
+    def test_short_cluster_in_args(self):
+        seen = []
+        class Param(parser.FlagParameter):
+            def read_argument(self, ba, i):
+                seen.append(tuple(ba.in_args))
+                super(Param, self).read_argument(ba, i)
+        params = [
+            Param(value=True, conv=parser.is_true,
+                  aliases=['-' + name], argument_name=name)
+            for name in 'abc']
+        csig = parser.CliSignature(params)
+        ba = read_arguments(csig, ['-a', '-abc'])
+        self.assertEqual(ba.kwargs, {'a': True, 'b': True, 'c': True})
+        self.assertEqual(
+            seen, [('-a', '-abc'), ('-a', '-abc'),
+                   ('-a', '-bc'), ('-a', '-c')])
+        self.assertEqual(ba.in_args, ('-a', '-abc'))
+
+    def test_read_arguments_many(self):
+        csig = parser.CliSignature.from_signature(
+            support.s('one:int, *, flag=False'))
+        consumed = []
+        def argvs():
+            for argv in (['1'], ['--flag', '2'], ['x'], ['3']):
+                consumed.append(argv)
+                yield argv
+        results = csig.read_arguments_many(argvs(), 'test')
+        ba = next(results)
+        self.assertEqual(consumed, [['1']])
+        self.assertEqual((ba.args, ba.kwargs), ([1], {}))
+        ba = next(results)
+        self.assertEqual((ba.args, ba.kwargs), ([2], {'flag': True}))
+        self.assertRaises(errors.BadArgumentFormat, next, results)
+        self.assertEqual(len(consumed), 3)
+
+        results = list(csig.read_arguments_many(
+            argvs(), 'test', catch_errors=True))
+        self.assertEqual([ba.args for ba in results[:2]], [[1], [2]])
+        self.assertTrue(isinstance(results[2], errors.BadArgumentFormat))
+        self.assertEqual(results[2].pos, 0)
+        self.assertEqual(results[2].val, 'x')
+        self.assertEqual(results[3].args, [3])
+
+    def test_bound_arguments_reset(self):
+        csig = parser.CliSignature.from_signature(
+            support.s('one, *args, flag=False'))
+        ba = read_arguments(csig, ['a', 'b', '--flag'])
+        args, kwargs = ba.args, ba.kwargs
+        self.assertEqual(tuple(ba), (None, [], ['a', 'b'], {'flag': True}))
+        self.assertFalse(hasattr(ba, '__dict__'))
+        for attr in ('posparam', 'sticky', 'posarg_only', 'skip', 'stop',
+                     'unsatisfied'):
+            self.assertFalse(hasattr(ba, attr), attr)
+        ba.reset(['c'], 'other')
+        self.assertEqual(tuple(ba), (None, [], ['c'], {}))
+        self.assertEqual(ba.name, 'other')
+        self.assertEqual(ba.in_args, ('c',))
+        self.assertTrue(ba.args is args)
+        self.assertTrue(ba.kwargs is kwargs)
+        self.assertRaises(errors.MissingRequiredArguments, ba.reset, [], 'x')
+        self.assertFalse(hasattr(ba, 'unsatisfied'))
+
     def test_converter_ignore(self):
         @parser.parameter_converter
         def conv(param, annotations):
@@ -441,9 +536,22 @@ class SigErrorTests(object):
     unknown_kw = (
         '', ['--one'], errors.UnknownOption,
         'Unknown option \'--one\'')
+    unknown_kw_glued = (
+        '', ['--one=1'], errors.UnknownOption,
+        'Unknown option \'--one\'')
+    unknown_short = (
+        '*, o=False', ['-a'], errors.UnknownOption,
+        'Unknown option \'-a\'')
     unknown_kw_after_short_flag = (
         '*, o=False', ['-oa'], errors.UnknownOption,
         'Unknown option \'-a\'')
+    unknown_kw_suggestion = (
+        '*, verbose=False, dry_run=False', ['--dryrun'], errors.UnknownOption,
+        'Unknown option \'--dryrun\', did you mean \'--dry-run\'?')
+    unknown_kw_suggestions = (
+        '*, color:"colour"=""', ['--colr'], errors.UnknownOption,
+        'Unknown option \'--colr\', '
+        'did you mean \'--color\' or \'--colour\'?')
     missing_value = (
         '*, one', ['--one'], errors.MissingValue,
         'No value found after --one')
@@ -463,6 +571,301 @@ class SigErrorTests(object):
             )
 
 
+class ErrorContextTests(unittest.TestCase):
+    def assertContext(self, sig_str, args, pos, param):
+        csig = parser.CliSignature.from_signature(support.s(sig_str))
+        try:
+            read_arguments(csig, args)
+        except errors.ArgumentError as e:
+            self.assertEqual(e.pos, pos)
+            self.assertEqual(e.val, args[pos])
+            self.assertEqual(e.ba.in_args, tuple(args))
+            if param is None:
+                self.assertFalse(hasattr(e, 'param'))
+            else:
+                self.assertEqual(e.param.display_name, param)
+        else:
+            self.fail('ArgumentError not raised')
+
+    def test_bad_value(self):
+        self.assertContext('one:int', ['x'], 0, 'one')
+        self.assertContext('*args, one:int', ['a', 'b', '--one=x'], 2, '--one')
+
+    def test_too_many(self):
+        self.assertContext('one', ['1', '2'], 1, None)
+        self.assertContext('*, one:int', ['a', '--one=x'], 0, None)
+
+    def test_unknown_option(self):
+        self.assertContext('*, one:int', ['--one', '1', '-x'], 2, None)
+
+
+class _CountedArg(str):
+    lookups = 0
+
+    def __hash__(self):
+        _CountedArg.lookups += 1
+        return str.__hash__(self)
+
+
+class FallbackSeekTests(unittest.TestCase):
+    def read(self, args, abbreviations=False):
+        def func():
+            raise NotImplementedError
+        csig = parser.CliSignature.from_signature(
+            support.s('one:int, *, verbose=False'), extra=[
+                parser.FallbackCommandParameter(func=func, aliases=['--alt']),
+                parser.FallbackCommandParameter(func=func, aliases=['--flb']),
+            ], abbreviations=abbreviations)
+        _CountedArg.lookups = 0
+        return read_arguments(csig, [_CountedArg(arg) for arg in args])
+
+    def test_finds_fallback(self):
+        ba = self.read(['x', 'a', 'b', '--flb', 'c'])
+        self.assertEqual(ba.args, ['test --flb'])
+
+    def test_abbreviated(self):
+        ba = self.read(['--verbose', '--x', '--fl'], abbreviations=True)
+        self.assertEqual(ba.args, ['test --flb'])
+        self.assertRaises(
+            errors.UnknownOption, self.read, ['--verbose', '--x', '--fl'])
+        self.assertRaises(
+            errors.UnknownOption, self.read, ['--x', '--verb'],
+            abbreviations=True)
+
+    def test_linear(self):
+        for n in (10, 1000, 100000):
+            self.assertRaises(
+                errors.BadArgumentFormat, self.read, ['x'] + ['a'] * n)
+            # every argument after the faulty one is looked up once
+            self.assertEqual(_CountedArg.lookups, n)
+
+    def test_no_fallback(self):
+        csig = parser.CliSignature.from_signature(support.s('one:int'))
+        _CountedArg.lookups = 0
+        self.assertRaises(
+            errors.BadArgumentFormat, read_arguments, csig,
+            [_CountedArg(arg) for arg in ['x'] + ['a'] * 1000])
+        self.assertEqual(_CountedArg.lookups, 0)
+
+
+class AbbreviationTests(unittest.TestCase):
+    def read(self, args, abbreviations=True):
+        sig = support.s(
+            '*, verbose=False, version=False, dry_run=False, '
+            'color:"colour"=""')
+        csig = parser.CliSignature.from_signature(
+            sig, abbreviations=abbreviations)
+        return read_arguments(csig, args)
+
+    def test_prefix(self):
+        ba = self.read(['--verb', '--dry', '--col=red'])
+        self.assertEqual(ba.kwargs, {
+            'verbose': True, 'dry_run': True, 'color': 'red'})
+
+    def test_exact(self):
+        ba = self.read(['--version', '--colour', 'red'])
+        self.assertEqual(ba.kwargs, {'version': True, 'color': 'red'})
+
+    def test_ambiguous(self):
+        try:
+            self.read(['--dry', '--ver'])
+        except errors.AmbiguousOption as e:
+            self.assertEqual(e.candidates, ['--verbose', '--version'])
+            self.assertEqual(e.pos, 1)
+            self.assertEqual(
+                str(e), "Error: Ambiguous option '--ver', "
+                        "could be --verbose, --version")
+        else:
+            self.fail('AmbiguousOption not raised')
+
+    def test_unknown(self):
+        self.assertRaises(errors.UnknownOption, self.read, ['--verbatim'])
+        self.assertRaises(errors.UnknownOption, self.read, ['--w'])
+
+    def test_disabled(self):
+        self.assertRaises(
+            errors.UnknownOption, self.read, ['--verb'], abbreviations=False)
+
+    def test_many_options(self):
+        params = [
+            parser.FlagParameter(
+                value=True, conv=parser.is_true,
+                aliases=['--option-{0:04}'.format(i)],
+                argument_name='o{0}'.format(i))
+            for i in range(3000)]
+        csig = parser.CliSignature(params, abbreviations=True)
+        self.assertTrue(csig.long_option('--option-1234') is params[1234])
+        self.assertRaises(
+            errors.AmbiguousOption, csig.long_option, '--option-12')
+        self.assertTrue(csig.long_option('--other') is None)
+
+
+class SuggestionTests(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(_suggest.distance('', 'abc'), 3)
+        self.assertEqual(_suggest.distance('kitten', 'sitting'), 3)
+        self.assertEqual(_suggest.distance('--verbose', '--verbose'), 0)
+
+    def test_closest(self):
+        index = _suggest.Index(['commit', 'checkout', 'clone', 'config'])
+        self.assertEqual(index.closest('comit'), ['commit'])
+        self.assertEqual(index.closest('chekcout'), ['checkout'])
+        self.assertEqual(index.closest('cone'), ['clone'])
+        self.assertEqual(index.closest('push'), [])
+        self.assertEqual(index.closest('co'), [])
+
+    def test_empty(self):
+        self.assertEqual(_suggest.Index([]).closest('--verbose'), [])
+
+    def test_same_as_scan(self):
+        names = ['--option-{0}-{1}'.format(word, i)
+                 for word in ('alpha', 'beta', 'gamma', 'delta')
+                 for i in range(50)]
+        index = _suggest.Index(names)
+        index.closest('--warm-up')
+        for word in ('--option-alpah-1', '--option-bta-22', '--opt-gamma-3',
+                     '--option-delta-99', '--nothing'):
+            radius = _suggest.max_distance(word)
+            expected = sorted(
+                (_suggest.distance(word, name), name) for name in names)
+            expected = [name for d, name in expected if d <= radius][:3]
+            self.assertEqual(index.closest(word), expected)
+        self.assertFalse(index._root is None)
+
+    def test_lazy(self):
+        csig = parser.CliSignature.from_signature(
+            support.s('*, verbose=False'))
+        read_arguments(csig, ['--verbose'])
+        try:
+            read_arguments(csig, ['--verbos'])
+        except errors.UnknownOption as e:
+            self.assertEqual(csig._option_index.lookups, 0)
+            self.assertEqual(e.suggestions, ['--verbose'])
+            self.assertEqual(csig._option_index.lookups, 1)
+        else:
+            self.fail('UnknownOption not raised')
+
+
+class ResponseFileTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, data, name='args'):
+        path = os.path.join(self.dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, sig_str, args, mode='lines'):
+        csig = parser.CliSignature.from_signature(support.s(sig_str))
+        return csig.read_arguments(args, 'test', response_files=mode)
+
+    def test_lines(self):
+        path = self.write(b'a b\r\n\n--flag\nc')
+        ba = self.read('*args, flag=False', ['x', '@' + path, 'y'])
+        self.assertEqual(ba.args, ['x', 'a b', 'c', 'y'])
+        self.assertEqual(ba.kwargs, {'flag': True})
+
+    def test_nul(self):
+        path = self.write(b'a\nb\0c\0\0')
+        ba = self.read('*args', ['@' + path], mode='nul')
+        self.assertEqual(ba.args, ['a\nb', 'c'])
+
+    def test_shell(self):
+        path = self.write(b'a "b c" # comment\n\'d e\'\n')
+        ba = self.read('*args', ['@' + path], mode='shell')
+        self.assertEqual(ba.args, ['a', 'b c', 'd e'])
+
+    def test_mmap(self):
+        orig = _argfiles.MMAP_THRESHOLD
+        _argfiles.MMAP_THRESHOLD = 0
+        self.addCleanup(setattr, _argfiles, 'MMAP_THRESHOLD', orig)
+        path = self.write(b''.join(
+            'file{0}\n'.format(i).encode('ascii') for i in range(1000)))
+        ba = self.read('*args', ['@' + path])
+        self.assertEqual(ba.args, ['file{0}'.format(i) for i in range(1000)])
+
+    def test_disabled(self):
+        path = self.write(b'a\n')
+        csig = parser.CliSignature.from_signature(support.s('*args'))
+        ba = read_arguments(csig, ['@' + path, '@'])
+        self.assertEqual(ba.args, ['@' + path, '@'])
+
+    def test_bad_mode(self):
+        self.assertRaises(ValueError, self.read, '*args', [], mode='spaces')
+
+    def test_lazy(self):
+        path = self.write(b'a\nb\n')
+        args = _argfiles.ResponseFileArguments(['x', '@' + path, 'y'], 'lines')
+        self.assertEqual(args[1], 'a')
+        self.assertEqual(args._items, ['x', 'a'])
+        self.assertEqual(args[:3], ('x', 'a', 'b'))
+        self.assertEqual(len(args), 4)
+        self.assertEqual(args[-1], 'y')
+        self.assertEqual(list(args), ['x', 'a', 'b', 'y'])
+
+    def test_missing_file(self):
+        path = os.path.join(self.dir, 'missing')
+        try:
+            self.read('*args', ['x', '@' + path, 'y'])
+        except errors.BadResponseFile as e:
+            self.assertEqual(e.pos, 1)
+            self.assertEqual(e.val, '@' + path)
+            self.assertEqual(e.path, path)
+            self.assertTrue(str(e).startswith(
+                'Error: Could not read response file ' + path + ': '))
+        else:
+            self.fail('BadResponseFile not raised')
+
+    def test_missing_file_param(self):
+        path = os.path.join(self.dir, 'missing')
+        try:
+            self.read('a, b=None', ['x', '@' + path])
+        except errors.BadResponseFile as e:
+            self.assertEqual(e.pos, 1)
+            self.assertEqual(getattr(e, 'param', None), None)
+        else:
+            self.fail('BadResponseFile not raised')
+
+    def test_missing_file_fallback(self):
+        path = os.path.join(self.dir, 'missing')
+        func = support.f('')
+        sig = parser.CliSignature.from_signature(
+            support.s('*args'), extra=[parser.FallbackCommandParameter(
+                func=func, aliases=['--alt'])])
+        ba = sig.read_arguments(
+            ['@' + path, '--alt'], 'test', response_files='lines')
+        self.assertTrue(ba.func is func)
+
+    def test_missing_files_fallback(self):
+        path = os.path.join(self.dir, 'missing')
+        func = support.f('')
+        sig = parser.CliSignature.from_signature(
+            support.s('*args'), extra=[parser.FallbackCommandParameter(
+                func=func, aliases=['--alt'])])
+        ba = sig.read_arguments(
+            ['@' + path + '1', '@' + path + '2', '--alt'], 'test',
+            response_files='lines')
+        self.assertTrue(ba.func is func)
+        try:
+            sig.read_arguments(
+                ['@' + path + '1', '@' + path + '2', 'x'], 'test',
+                response_files='lines')
+        except errors.BadResponseFile as e:
+            self.assertEqual(e.path, path + '1')
+            self.assertEqual(e.pos, 0)
+            self.assertTrue(e.ba is not None)
+        else:
+            self.fail('BadResponseFile not raised')
+
+    def test_bad_quoting(self):
+        path = self.write(b'"a')
+        self.assertRaises(
+            errors.BadResponseFile, self.read, '*args', ['@' + path],
+            mode='shell')
+
+
 @testfunc
 def badparam(self, sig_str, locals=None):
     if locals is None:
@@ -473,6 +876,67 @@ def badparam(self, sig_str, locals=None):
         ValueError, parser.CliSignature.convert_parameter, params[0])
 
 
+class ConverterCacheTests(unittest.TestCase):
+    def converter(self, **kwargs):
+        calls = []
+        @parser.value_converter(name='HOST', **kwargs)
+        def host(arg):
+            calls.append(arg)
+            if arg == 'bad':
+                raise errors.CliValueError('unknown host')
+            return arg.upper()
+        return host, calls
+
+    def test_cache(self):
+        host, calls = self.converter(cache=2)
+        sig = support.s('*par:conv', locals={'conv': host})
+        csig = parser.CliSignature.from_signature(sig)
+        self.assertEqual(str(csig), '[par...]')
+        ba = read_arguments(csig, ['a', 'b', 'a', 'c', 'a', 'b'])
+        self.assertEqual(ba.args, ['A', 'B', 'A', 'C', 'A', 'B'])
+        self.assertEqual(calls, ['a', 'b', 'c', 'b'])
+        self.assertEqual(host.cache_info(), parser.CacheInfo(2, 4, 2, 2))
+        self.assertEqual(host.__name__, 'host')
+        host.cache_clear()
+        self.assertEqual(host.cache_info(), parser.CacheInfo(0, 0, 2, 0))
+
+    def test_process(self):
+        host, calls = self.converter(cache='process')
+        for arg in ['a', 'b', 'c', 'a', 'b', 'c']:
+            host(arg)
+        self.assertEqual(calls, ['a', 'b', 'c'])
+        self.assertEqual(host.cache_info(), parser.CacheInfo(3, 3, None, 3))
+
+    def test_errors(self):
+        host, calls = self.converter(cache=10)
+        sig = support.s('*par:conv', locals={'conv': host})
+        csig = parser.CliSignature.from_signature(sig)
+        for i in range(2):
+            try:
+                read_arguments(csig, ['a', 'bad'])
+            except errors.BadArgumentFormat as exc:
+                self.assertEqual(
+                    exc.message, 'Bad value for par: unknown host')
+                self.assertEqual(exc.pos, 1)
+            else:
+                self.fail('BadArgumentFormat not raised')
+        self.assertEqual(calls, ['a', 'bad', 'bad'])
+
+    def test_ttl(self):
+        host, calls = self.converter(cache=10, ttl=-1)
+        host('a')
+        host('a')
+        self.assertEqual(calls, ['a', 'a'])
+        host, calls = self.converter(cache=10, ttl=60)
+        host('a')
+        host('a')
+        self.assertEqual(calls, ['a'])
+
+    def test_bad_cache(self):
+        self.assertRaises(ValueError, self.converter, cache=0)
+        self.assertRaises(ValueError, self.converter, cache='thread')
+
+
 class UnknownAnnotation(object):
     pass
 
@@ -5,12 +5,14 @@
 import os
 import sys
 import shutil
+import tempfile
 import unittest
 
 from six.moves import cStringIO
+from sigtools import modifiers
 
 from clize.tests import util
-from clize import runner, errors
+from clize import runner, errors, parser, _cache
 
 
 class MockModule(object):
@@ -372,6 +374,20 @@ class GetCliTests(unittest.TestCase):
         self.assertRaises(TypeError, runner.Clize.get_cli, obj)
 
 class RunnerTests(unittest.TestCase):
+    def test_unknown_subcommand(self):
+        def commit():
+            raise NotImplementedError
+        def checkout():
+            raise NotImplementedError
+        out, err = util.run([commit, checkout], ['test', 'comit'])
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(
+            err.getvalue().splitlines()[0],
+            'test: Unknwon command "comit", did you mean \'commit\'?')
+        out, err = util.run([commit, checkout], ['test', 'push'])
+        self.assertEqual(
+            err.getvalue().splitlines()[0], 'test: Unknwon command "push"')
+
     def test_subcommand(self):
         def func1(x):
             return x+' world'
@@ -468,6 +484,31 @@ class RunnerTests(unittest.TestCase):
         self.assertTrue(stderr.getvalue())
         self.assertFalse(stdout.getvalue())
 
+    def test_response_files(self):
+        def func(*args): return ' '.join(args)
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('b\nc\n')
+        stdout, stderr = util.run(
+            func, response_files='lines', args=['test', 'a', '@' + path])
+        self.assertFalse(stderr.getvalue())
+        self.assertEqual(stdout.getvalue(), 'a b c\n')
+        stdout, stderr = util.run(func, args=['test', '@' + path])
+        self.assertEqual(stdout.getvalue(), '@' + path + '\n')
+        cli = runner.Clize(func, response_files='lines')
+        self.assertEqual(cli.parameters()['response_files'], 'lines')
+
+    def test_abbreviations(self):
+        @modifiers.kwoargs('verbose')
+        def func(verbose=False): return repr(verbose)
+        stdout, stderr = util.run(
+            func, abbreviations=True, args=['test', '--verb'])
+        self.assertFalse(stderr.getvalue())
+        self.assertEqual(stdout.getvalue(), 'True\n')
+        stdout, stderr = util.run(func, args=['test', '--verb'])
+        self.assertTrue(stderr.getvalue())
+
     def test_run_sysargv(self):
         bmodules = sys.modules
         bargv = sys.argv
@@ -552,3 +593,180 @@ class RunnerTests(unittest.TestCase):
         out, err = util.run(func, ['test'], catch=[MyError])
         self.assertEqual(out.getvalue(), '')
         self.assertEqual(err.getvalue(), 'test: test_catch_argerror_cust\n')
+
+
+@modifiers.kwoargs('three', 'flag')
+@modifiers.annotate(two=int, three='t')
+def _cached_func(one, two, three=3, flag=False, *rest):
+    raise NotImplementedError
+
+
+class SignatureCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp()
+        self.backup_signature = runner.signature
+
+    def tearDown(self):
+        runner.signature = self.backup_signature
+        shutil.rmtree(self.temp)
+
+    def forbid_signature(self):
+        def signature(func):
+            self.fail('signature was computed')
+        runner.signature = signature
+
+    def test_store_load(self):
+        cli = runner.Clize(_cached_func, cache_dir=self.temp)
+        rep = str(cli.signature)
+        self.assertEqual(len(os.listdir(self.temp)), 1)
+        self.forbid_signature()
+        cli = runner.Clize(_cached_func, cache_dir=self.temp)
+        self.assertEqual(str(cli.signature), rep)
+        func, name, posargs, kwargs = cli.read_commandline(
+            ['test', '-t', '4', 'a', '5', 'b', '--flag'])
+        self.assertEqual(posargs, ['a', 5, 'b'])
+        self.assertEqual(kwargs, {'three': 4, 'flag': True})
+        self.assertTrue(func is _cached_func)
+        self.assertEqual(
+            [p.display_name for p in cli.signature.alternate], ['--help'])
+
+    def test_env_var(self):
+        backup = os.environ.get('CLIZE_CACHE_DIR')
+        os.environ['CLIZE_CACHE_DIR'] = self.temp
+        try:
+            runner.Clize(_cached_func).signature
+        finally:
+            if backup is None:
+                del os.environ['CLIZE_CACHE_DIR']
+            else:
+                os.environ['CLIZE_CACHE_DIR'] = backup
+        self.assertEqual(len(os.listdir(self.temp)), 1)
+
+    def test_stale(self):
+        name, key = _cache.func_key(_cached_func)
+        _cache.store(self.temp, 'signature', name, 'stale', [])
+        cli = runner.Clize(_cached_func, cache_dir=self.temp)
+        self.assertEqual(
+            str(cli.signature), '[-t INT] [--flag] one two [rest...]')
+        self.forbid_signature()
+        self.assertEqual(
+            _cache.load(self.temp, 'signature', name, key)[0].display_name,
+            'one')
+
+    def test_corrupt(self):
+        name, key = _cache.func_key(_cached_func)
+        _cache.store(self.temp, 'signature', name, key, [])
+        for fname in os.listdir(self.temp):
+            with open(os.path.join(self.temp, fname), 'wb') as f:
+                f.write(b'garbage')
+        cli = runner.Clize(_cached_func, cache_dir=self.temp)
+        self.assertEqual(
+            str(cli.signature), '[-t INT] [--flag] one two [rest...]')
+
+    def test_unidentifiable(self):
+        param = parser.PositionalParameter(
+            display_name='arg', argument_name='arg')
+        @modifiers.annotate(arg=param)
+        def func(arg):
+            raise NotImplementedError
+        self.assertTrue(_cache.func_key(func) is None)
+        self.assertTrue(_cache.func_key(parser.Parameter) is None)
+        self.assertTrue(_cache.func_key(self.setUp) is None)
+        self.assertEqual(
+            str(runner.Clize(func, cache_dir=self.temp).signature), 'arg')
+        self.assertEqual(os.listdir(self.temp), [])
+
+
+class LazyHelpTests(unittest.TestCase):
+    def test_run_no_help(self):
+        modules = util.imported_modules(
+            'import clize\n'
+            'def func(arg, *args):\n'
+            '    return arg\n'
+            'clize.run(func, args=["test", "abc", "def"], exit=False)\n')
+        self.assertTrue('clize.runner' in modules)
+        self.assertFalse('clize.help' in modules)
+        self.assertFalse('clize._cache' in modules)
+
+    def test_help_no_cache(self):
+        modules = util.imported_modules(
+            'import clize, os\n'
+            'os.environ.pop("CLIZE_CACHE_DIR", None)\n'
+            'def func(arg):\n'
+            '    return arg\n'
+            'clize.run(func, args=["test", "--help"], exit=False)\n')
+        self.assertTrue('clize.help' in modules)
+        self.assertFalse('clize._cache' in modules)
+
+    def test_dispatcher_no_help(self):
+        modules = util.imported_modules(
+            'import clize\n'
+            'def func1(arg):\n'
+            '    return arg\n'
+            'def func2():\n'
+            '    raise NotImplementedError\n'
+            'clize.run(func1, func2, args=["test", "func1", "abc"],\n'
+            '          exit=False)\n')
+        self.assertFalse('clize.help' in modules)
+
+    def test_help_param(self):
+        def func():
+            raise NotImplementedError
+        cli = runner.Clize(func)
+        param = cli.signature.aliases['--help']
+        self.assertFalse('helper' in cli.__dict__)
+        self.assertTrue(param.func is param.func)
+        self.assertTrue(param.func.func.__self__ is cli.helper)
+        self.assertEqual(param.description, 'Show the help')
+        out, err = util.run(func, ['test', '--help'])
+        self.assertEqual(out.getvalue(), 'Usage: test\n\n'
+                         'Other actions:\n  -h, --help   Show the help\n')
+
+
+def _lazy_target(arg):
+    """Lazy target"""
+    return 'lazy ' + arg
+
+
+class LazyCommandTests(unittest.TestCase):
+    path = 'clize.tests.test_runner:_lazy_target'
+
+    def test_list(self):
+        cli = runner.Clize.get_cli([self.path])
+        cmd = cli.func.__self__.cmds_by_name['lazy-target']
+        self.assertTrue(isinstance(cmd, runner.LazyCommand))
+        self.assertFalse('command' in vars(cmd))
+        self.assertEqual(cmd('test lazy-target', 'abc'), 'lazy abc')
+        self.assertTrue(cmd.command.func is _lazy_target)
+
+    def test_dict(self):
+        def func():
+            raise NotImplementedError
+        out, err = util.run({'abc': self.path, 'def': func},
+                            ['test', 'abc', 'x'])
+        self.assertEqual(out.getvalue(), 'lazy x\n')
+        self.assertEqual(err.getvalue(), '')
+
+    def test_help_description(self):
+        cmd = runner.LazyCommand(self.path, description='From manifest')
+        cli = runner.Clize.get_cli([cmd])
+        out, err = util.run(cli, ['test', '--help'])
+        self.assertEqual(out.getvalue().split(), [
+            'Usage:', 'test', 'command', '[args...]',
+            'Commands:', 'lazy-target', 'From', 'manifest'])
+        self.assertFalse('command' in vars(cmd))
+        out, err = util.run(cli, ['test', '--help', '--usage'])
+        self.assertEqual(out.getvalue().splitlines(), [
+            'test --help [--usage]',
+            'test lazy-target arg',
+            'test lazy-target --help [--usage]',
+            ])
+        self.assertTrue('command' in vars(cmd))
+
+    def test_help_import(self):
+        out, err = util.run([self.path], ['test', '--help'])
+        self.assertTrue('lazy-target   Lazy target' in out.getvalue())
+
+    def test_bad_path(self):
+        self.assertRaises(ValueError, runner.LazyCommand, 'clize.runner')
+        self.assertRaises(ValueError, runner.LazyCommand, 'clize.runner:')
@@ -0,0 +1,91 @@
+# clize -- A command-line argument parser for Python
+# Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
+# See COPYING for details.
+
+import asyncio
+import unittest
+
+from clize import runner, errors, compile
+from clize.tests import util
+
+
+async def _coroutine(one, *, two=''):
+    """Coroutine command
+
+    one: First
+
+    two: Second
+    """
+    await asyncio.sleep(0)
+    return one + two
+
+
+async def _async_gen(*values):
+    for value in values:
+        await asyncio.sleep(0)
+        if value == 'fail':
+            raise errors.UserError('failed')
+        yield value
+
+
+class AsyncTests(unittest.TestCase):
+    def test_coroutine(self):
+        cli = runner.Clize(_coroutine)
+        self.assertEqual(cli('test', 'a', '--two', 'b'), 'ab')
+        self.assertEqual(str(cli.signature), '[--two=STR] one')
+
+    def test_help(self):
+        out, err = util.run(_coroutine, ['test', '--help'])
+        self.assertTrue('one          First' in out.getvalue())
+        self.assertTrue('--two=STR    Second' in out.getvalue())
+
+    def test_sync_has_no_loop(self):
+        policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(_ForbiddenPolicy())
+        try:
+            self.assertEqual(runner.Clize(lambda: 1)('test'), 1)
+        finally:
+            asyncio.set_event_loop_policy(policy)
+
+    def test_loop_factory(self):
+        loops = []
+        def loop_factory():
+            loop = asyncio.new_event_loop()
+            loops.append(loop)
+            return loop
+        cli = runner.Clize(_coroutine, loop_factory=loop_factory)
+        self.assertEqual(cli('test', 'a'), 'a')
+        self.assertEqual(len(loops), 1)
+        self.assertTrue(loops[0].is_closed())
+
+    def test_subcommand(self):
+        out, err = util.run(
+            [_coroutine, _async_gen], ['test', 'coroutine', 'x'])
+        self.assertEqual(out.getvalue(), 'x\n')
+
+    def test_alternate(self):
+        out, err = util.run(
+            lambda: None, ['test', '--async-gen', 'a'], alt=[_async_gen])
+        self.assertEqual(out.getvalue(), 'a\n')
+
+    def test_async_gen(self):
+        ret = runner.Clize(_async_gen)('test', 'a', 'b')
+        self.assertTrue(isinstance(ret, runner.StreamedOutput))
+        self.assertEqual(list(ret), ['a', 'b'])
+        out, err = util.run(_async_gen, ['test', 'a', 'b'])
+        self.assertEqual(out.getvalue(), 'a\nb\n')
+
+    def test_async_gen_error(self):
+        out, err = util.run(_async_gen, ['test', 'a', 'fail', 'b'])
+        self.assertEqual(out.getvalue(), 'a\n')
+        self.assertEqual(err.getvalue(), 'test: failed\n')
+
+    def test_compile(self):
+        self.assertRaises(
+            ValueError, compile.compile_target,
+            'clize.tests.test_runner_py3k:_coroutine')
+
+
+class _ForbiddenPolicy(asyncio.DefaultEventLoopPolicy):
+    def new_event_loop(self):
+        raise AssertionError('An event loop was created')
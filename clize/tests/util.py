@@ -2,6 +2,8 @@
 # Copyright (C) 2011-2015 by Yann Kaiser <kaiser.yann@gmail.com>
 # See COPYING for details.
 
+import sys
+import subprocess
 from functools import partial
 import unittest
 
@@ -45,6 +47,15 @@ def testfunc(test_func):
 repeated_test = partial(build_sigtests, None)
 
 
+def imported_modules(code):
+    """Runs ``code`` in a fresh interpreter and returns the names of the
+    modules it left in `sys.modules`"""
+    out = subprocess.check_output([
+        sys.executable, '-c',
+        code + '\nimport sys\nprint("\\n".join(sys.modules))'])
+    return set(out.decode().split())
+
+
 def read_arguments(sig, args):
     return sig.read_arguments(args, 'test')
 
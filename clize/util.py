@@ -21,6 +21,8 @@ class _Unset(object):
     __slots__ = ()
     def __repr__(self):
         return '<unset>'
+    def __reduce__(self):
+        return 'UNSET'
 UNSET = _Unset()
 del _Unset
 
@@ -230,6 +232,16 @@ def get_terminal_width():
         return 78
 
 
+def get_cache_dir(cache_dir):
+    """Returns ``cache_dir``, or the directory named by the
+    ``CLIZE_CACHE_DIR`` environment variable if it is `None`. Lives here
+    rather than in ``clize._cache`` so that commands without a cache don't
+    import it."""
+    if cache_dir is None:
+        return os.environ.get('CLIZE_CACHE_DIR') or None
+    return cache_dir
+
+
 class Formatter(object):
     delimiter = '\n'
 
@@ -0,0 +1,22 @@
+from sigtools import modifiers
+from clize import run, parameters, errors
+
+
+@modifiers.annotate(paths=parameters.parallel(jobs=4))
+def main(*paths):
+    """Counts the lines in each of the given files
+
+    paths: The files to count lines in.
+    """
+    total = 0
+    for path in paths:
+        try:
+            with open(path) as f:
+                total += sum(1 for line in f)
+        except IOError as exc:
+            raise errors.UserError(exc.strerror)
+    return '{0} {1}'.format(total, ' '.join(paths))
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,24 @@
+from sigtools import modifiers
+from clize import run, parameters
+
+
+@modifiers.kwoargs('verbose')
+@modifiers.annotate(paths=parameters.stream, verbose='v')
+def main(paths, verbose=False):
+    """Counts the lines in the given files
+
+    paths: The files to count lines in.
+
+    verbose: Show the count for each file.
+    """
+    total = 0
+    for path in paths:
+        with open(path) as f:
+            count = sum(1 for line in f)
+        if verbose:
+            print('{0} {1}'.format(count, path))
+        total += count
+    return total
+
+
+run(main, response_files='lines')